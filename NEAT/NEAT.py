@@ -1,24 +1,83 @@
+import math
 import random
-from .config import config
-
-from .genotype import Genotype, crossover
+import time
+from .config import Config
+
+from .genotype import Genotype, crossover, mutate_weights
+from .episodes import EpisodeStats
+from .evaluator import create_evaluator
+from .innovation import InnovationRegistry, innovation_registry
+from .checkpoint import load_checkpoint, load_checkpoint_config, save_checkpoint
+from .fitness_cache import FitnessCache
+from .hooks import StatsCollector
+from .history import RunHistory
+from .rng import RandomStreams
+from .steady_state import evolve_steady_state
 
 class NEAT:
-    def __init__(self, fn_fitness):
-        self.num_input = config.get("input_nodes")
-        self.num_output = config.get("output_nodes")
+    def __init__(self, fn_fitness, config=None):
+        self.config = config if config is not None else Config.load()
+        self.rng = RandomStreams(self.config.seed)
+        self.num_input = self.config.input_nodes
+        self.num_output = self.config.output_nodes
         self.generation = 0
-        self.population_size = config.get("population_size")
+        self.population_size = self.config.population_size
 
         self.fn_fitness = fn_fitness
         self.population = []
         self.species = []
         self.species_representatives = []
+        self.species_ids = []  # stable id of every species, kept across generations
+        self.next_species_id = 0
+        self.species_best = {}  # species id -> (best fitness, generation it was reached)
+
+        self.num_generations = self.config.num_generations
+        self.best_seen = None
+        self.history = RunHistory(self.config.history, self.config.history_top_k, self.config.history_path)
+
+        self.input_nodes = self.config.input_nodes
+        self.output_nodes = self.config.output_nodes
+
+        self.evaluator = None
+        self.compatibility_threshold = self.config.compatibility_threshold
+        self.fitness_cache = FitnessCache(self.config.fitness_cache_size) if self.config.fitness_cache_size else None
+        self.last_evaluations = 0  # genotypes actually sent to the evaluator by the last evaluate
+
+        self.hooks = []
+        if self.config.stats_path:
+            self.add_hook(StatsCollector(self.config.stats_path, self.config.stats_format))
+
+        # every run numbers its innovations on its own unless it opts into the process wide registry
+        per_generation = self.config.innovation_tracking == "generation"
+        if self.config.reset_innovations:
+            self.innovations = InnovationRegistry(per_generation)
+        else:
+            self.innovations = innovation_registry
+            self.innovations.per_generation = per_generation
+
+    @classmethod
+    def resume(cls, path, fn_fitness=None, config=None):
+        """Create a NEAT run from a checkpoint, evolve() then continues from the saved generation.
+
+        Without a config the run continues with the config stored in the checkpoint.
+        """
+        neat = cls(fn_fitness, config if config is not None else load_checkpoint_config(path))
+        neat.load_checkpoint(path)
+        return neat
 
-        self.num_generations = config.get("num_generations")
+    def save_checkpoint(self, path):
+        save_checkpoint(self, path)
 
-        self.input_nodes = config.get("input_nodes")
-        self.output_nodes = config.get("output_nodes")
+    def load_checkpoint(self, path):
+        load_checkpoint(self, path)
+
+    def add_hook(self, hook):
+        """Register a hooks.Hook whose callbacks run during evolve."""
+        self.hooks.append(hook)
+
+    def _emit(self, event, *args):
+        for hook in self.hooks:
+            getattr(hook, event)(self, *args)
 
     def print_params(self):
         print(f"Number of species: {len(self.species)}")
@@ -32,67 +91,234 @@ class NEAT:
             print("---" * 10)
 
     def init_population(self):
+        rng = self.rng.run()
         self.population = []
         for _ in range(self.population_size):
-            genotype = Genotype(self.input_nodes, self.output_nodes)
+            genotype = Genotype(self.input_nodes, self.output_nodes, self.config, rng, self.innovations)
             self.population.append(genotype)
 
     def run(self, fn_step):
         input_values = fn_step()
 
+    def get_evaluator(self):
+        if self.evaluator is None:
+            self.evaluator = create_evaluator(
+                self.config.evaluator, self.config.num_workers, self.config.evaluator_chunksize, self.config
+            )
+        return self.evaluator
+
     def evaluate(self, fn_eval):
+        self.get_evaluator()
+
+        # in seeded runs every genotype gets its own evaluation seed, the same with every evaluator
+        if self.rng.seed is not None:
+            for i, g in enumerate(self.population):
+                g.eval_seed = self.rng.genome_seed(self.generation, i)
+        episode_seeds = self.episode_seeds(self.generation)
         for g in self.population:
-            g.fitness_score = fn_eval(g)
+            g.episode_seeds = episode_seeds
+
+        if self.config.fidelity_budgets:
+            self.evaluate_successive_halving(fn_eval)
+        else:
+            self.last_evaluations = self._score(fn_eval, self.population)
+
+    def evaluate_successive_halving(self, fn_eval):
+        """
+        Multi fidelity evaluation: the population is scored with the first of
+        fidelity_budgets, the best fidelity_keep fraction again with the next
+        budget and so on. A genotype keeps the score of the last round it reached.
+
+        Scores of different budgets are not comparable (a snake dropped after 50
+        steps can outscore one that played 500), so the round reached ranks first:
+        the scores of the genotypes dropped after a round are shifted down until
+        the best of them is 1 below the worst genotype promoted out of it. Scores
+        keep their order and differences inside a round, the final round is unchanged.
+
+        fn_eval reads genotype.eval_budget (e.g. the number of snake steps) and may
+        stop as soon as it cannot reach genotype.eval_cutoff. A round first plays
+        as many candidates as it promotes in full (eval_cutoff None), the best of
+        the previous round first, and the lowest of their scores is the cutoff of
+        the others: a genotype stopped below it is beaten by a whole promotion's
+        worth of complete scores, so it is never promoted and ranks below every
+        genotype that reached the cutoff. Only the order of the scores below the
+        cutoff among each other may come from stopped games.
+        """
+        budgets = self.config.fidelity_budgets
+        candidates = self.population
+        evaluations = 0
+        dropped = []  # genotypes dropped after every round but the last, best first
+        for round_index, budget in enumerate(budgets):
+            last_round = round_index == len(budgets) - 1
+            keep = len(candidates) if last_round else max(1, math.ceil(len(candidates) * self.config.fidelity_keep))
+            for g in candidates:
+                g.eval_budget = budget
+                g.eval_cutoff = None
+            evaluations += self._score(fn_eval, candidates[:keep], budget)
+            if last_round:
+                break
+
+            rest = candidates[keep:]
+            if rest:
+                cutoff = min(g.fitness_score for g in candidates[:keep])
+                for g in rest:
+                    g.eval_cutoff = cutoff
+                evaluations += self._score(fn_eval, rest, budget)
+            # stable, a stopped genotype never displaces one played in full
+            ranked = sorted(candidates, key=lambda g: g.fitness_score, reverse=True)
+            candidates = ranked[:keep]
+            dropped.append(ranked[keep:])
+
+        # from the last round down, so every round ends up below all the rounds after it
+        floor = min(g.fitness_score for g in candidates)
+        for round_dropped in reversed(dropped):
+            if not round_dropped:
+                continue
+            best = round_dropped[0].fitness_score
+            if best >= floor:
+                for g in round_dropped:
+                    g.fitness_score -= best - floor + 1
+            floor = min(floor, round_dropped[-1].fitness_score)
+
+        self.last_evaluations = evaluations
+
+    def episode_seeds(self, generation):
+        """
+        Common random numbers: with config episodes > 1 every genotype of a
+        generation plays the same episodes, so their scores differ by the
+        genotypes and not by the luck of the draw. Drawn from the random module
+        in unseeded runs, None with a single episode.
+        """
+        if self.config.episodes == 1:
+            return None
+        if self.rng.seed is None:
+            return tuple(random.getrandbits(63) for _ in range(self.config.episodes))
+        return tuple(self.rng.episode_seed(generation, e) for e in range(self.config.episodes))
+
+    def set_fitness(self, genotype, result):
+        """Store a result of fn_eval, the episode scores of a multi episode evaluation are reduced to their mean."""
+        if self.config.episodes == 1:
+            genotype.fitness_score = result
+            return
+        genotype.fitness_stats = EpisodeStats(result, self.config.episode_confidence)
+        genotype.fitness_score = genotype.fitness_stats.mean
+
+    def fitness_cache_key(self, genotype, budget=None):
+        """Fitness cache key: the genes, the episodes played and, in a multi fidelity round, its budget and cutoff."""
+        key = (genotype.content_hash(), genotype.episode_seeds)
+        return key if budget is None else key + (budget, genotype.eval_cutoff)
+
+    def _score(self, fn_eval, genotypes, budget=None):
+        """Set the fitness_score of genotypes, returns the number of evaluations actually run."""
+        if self.fitness_cache is None:
+            scores = self.evaluator.evaluate(fn_eval, genotypes)
+            for g, score in zip(genotypes, scores):
+                self.set_fitness(g, score)
+            return len(genotypes)
+
+        # only genotypes never scored before (on these episodes, with this budget and cutoff) are evaluated, identical ones only once
+        pending = {}
+        for g in genotypes:
+            key = self.fitness_cache_key(g, budget)
+            score = self.fitness_cache.get(key)
+            if score is None:
+                pending.setdefault(key, []).append(g)
+            else:
+                self.set_fitness(g, score)
+
+        scores = self.evaluator.evaluate(fn_eval, [genotypes[0] for genotypes in pending.values()])
+        for (key, genotypes), score in zip(pending.items(), scores):
+            self.fitness_cache.put(key, score)
+            for g in genotypes:
+                self.set_fitness(g, score)
+        return len(pending)
+
+    def close(self):
+        """Shut down the evaluator workers and close the hooks, a new pool is started on the next evaluate."""
+        if self.evaluator is not None:
+            self.evaluator.close()
+            self.evaluator = None
+        for hook in self.hooks:
+            hook.close()
+        self.history.close()
 
     def compatibility_distance(self, g1, g2):
         return g1.compatibility_distance(g2)
 
+    def _assign_species(self, compatibility_threshold):
+        """First fit: every genotype joins the first representative closer than the threshold."""
+        if self.config.speciation == "matrix":
+            from .speciation import first_fit_species
+            self.species, self.species_representatives = first_fit_species(
+                self.population, self.species_representatives, compatibility_threshold,
+                self.config.compatibility_disjoint_coefficient, self.config.compatibility_weight_coefficient,
+            )
+            return
+
+        for genotype in self.population:
+            assigned = False
+            for i, representative in enumerate(self.species_representatives):
+                distance = genotype.compatibility_distance(representative, compatibility_threshold)
+
+                if distance < compatibility_threshold:
+                    self.species[i].append(genotype)
+                    assigned = True
+                    break
+
+            if not assigned:
+                self.species.append([genotype])
+                self.species_representatives.append(genotype)
+
     def speciate(self):
-        compatibility_threshold = config.get("compatibility_threshold")
-        
-        if not self.species_representatives:
+        compatibility_threshold = self.compatibility_threshold
+
+        # species[i] continues species_ids[i] of the previous generation, the species after them are new
+        previous_ids = self.species_ids if len(self.species_ids) == len(self.species_representatives) else []
+
+        if self.config.speciation == "kmedoids":
+            from .speciation import kmedoids_species
+            self.species, self.species_representatives = kmedoids_species(
+                self.population, self.species_representatives, self.config.target_species,
+                self.config.compatibility_disjoint_coefficient, self.config.compatibility_weight_coefficient,
+                self.config.kmedoids_iterations,
+            )
+            self._keep_species(previous_ids, [i for i, species in enumerate(self.species) if species])
+        elif not self.species_representatives:
             self.species = []
             self.species_representatives = []
-            for genotype in self.population:
-                assigned = False
-                for i, representative in enumerate(self.species_representatives):
-                    distance = genotype.compatibility_distance(representative)
-
-                    if distance < compatibility_threshold:
-                        self.species[i].append(genotype)
-                        assigned = True
-                        break
-                
-                if not assigned:
-                    self.species.append([genotype])
-                    self.species_representatives.append(genotype)
+            self._assign_species(compatibility_threshold)
+            self._keep_species([], range(len(self.species)))
         else:
             self.species = [[] for _ in self.species_representatives]
+            self._assign_species(compatibility_threshold)
             
-            for genotype in self.population:
-                assigned = False
-                for i, representative in enumerate(self.species_representatives):
-                    distance = genotype.compatibility_distance(representative)
-
-                    if distance < compatibility_threshold:
-                        self.species[i].append(genotype)
-                        assigned = True
-                        break
-                
-                if not assigned:
-                    self.species.append([genotype])
-                    self.species_representatives.append(genotype)
-            
-            non_empty_species = []
-            non_empty_representatives = []
-            for i, species in enumerate(self.species):
-                if len(species) > 0:
-                    non_empty_species.append(species)
-                    best_in_species = max(species, key=lambda g: g.fitness_score)
-                    non_empty_representatives.append(best_in_species)
-            
-            self.species = non_empty_species
-            self.species_representatives = non_empty_representatives
+            non_empty = [i for i, species in enumerate(self.species) if len(species) > 0]
+            self._keep_species(previous_ids, non_empty)
+            self.species_representatives = [max(species, key=lambda g: g.fitness_score) for species in self.species]
+
+        if self.config.target_species is not None:
+            self.adjust_compatibility_threshold(self.config.target_species)
+
+    def _keep_species(self, previous_ids, keep):
+        """Keep the species at the indices in keep and give them their ids, new species get fresh ones."""
+        species_ids = []
+        for i in keep:
+            if i < len(previous_ids):
+                species_ids.append(previous_ids[i])
+            else:
+                species_ids.append(self.next_species_id)
+                self.next_species_id += 1
+        self.species = [self.species[i] for i in keep]
+        self.species_representatives = [self.species_representatives[i] for i in keep]
+        self.species_ids = species_ids
+
+    def adjust_compatibility_threshold(self, target_species):
+        """Move the threshold one step towards the target species count for the next generation."""
+        step = self.config.compatibility_threshold_step
+        if len(self.species) < target_species:
+            self.compatibility_threshold = max(self.config.compatibility_threshold_min, self.compatibility_threshold - step)
+        elif len(self.species) > target_species:
+            self.compatibility_threshold += step
 
 
     def calculate_adjusted_fitness(self):
@@ -107,113 +333,194 @@ class NEAT:
             return
 
         new_population = []
+        rng = self.rng.generation(self.generation)
 
         if not self.species or len(self.species) == 0:
             sorted_pop = sorted(self.population, key=lambda g: g.fitness_score, reverse=True)
-            survivors_count = max(1, int(self.population_size * config.get("population_cut")))
+            survivors_count = max(1, int(self.population_size * self.config.population_cut))
             breeders = sorted_pop[:survivors_count]
             
             elite = crossover(breeders[0], breeders[0])
             new_population.append(elite)
+            num_elites = 1
             
             while len(new_population) < self.population_size:
-                strong = random.choice(breeders)
-                weak = random.choice(breeders)
-                child = crossover(strong, weak)
-                child.mutate()
+                strong = rng.choice(breeders)
+                weak = rng.choice(breeders)
+                child = crossover(strong, weak, rng)
+                child.mutate(weights=False, rng=rng)
                 new_population.append(child)
         else:
-            species_adjusted_fitness = []
-            for species in self.species:
-                species_total = sum(g.adjusted_fitness for g in species)
-                species_adjusted_fitness.append(species_total)
-            
-            total_adjusted_fitness = sum(species_adjusted_fitness)
-            
             best_genotype = max(self.population, key=lambda g: g.fitness_score)
-            elite = crossover(best_genotype, best_genotype)
-            new_population.append(elite)
-            
-            while len(new_population) < self.population_size:
-                if total_adjusted_fitness > 0:
-                    rand_val = random.uniform(0, total_adjusted_fitness)
-                    cumulative = 0
-                    selected_species_idx = 0
-                    for i, species_fitness in enumerate(species_adjusted_fitness):
-                        cumulative += species_fitness
-                        if rand_val <= cumulative:
-                            selected_species_idx = i
-                            break
-                else:
-                    selected_species_idx = random.randint(0, len(self.species) - 1)
-                
-                selected_species = self.species[selected_species_idx]
-                
-                if len(selected_species) >= 2:
-                    sorted_species = sorted(selected_species, key=lambda g: g.fitness_score, reverse=True)
-                    strong = sorted_species[0]
-                    weak = random.choice(sorted_species[1:]) if len(sorted_species) > 1 else sorted_species[0]
-                elif len(selected_species) == 1:
-                    strong = selected_species[0]
-                    weak = selected_species[0]
-                else:
-                    strong = random.choice(self.population)
-                    weak = random.choice(self.population)
-                
-                child = crossover(strong, weak)
-                child.mutate()
-                new_population.append(child)
+            self.cull_stagnant_species(best_genotype)
+
+            # every species is sorted once, the champion is first
+            ranked_species = [sorted(species, key=lambda g: g.fitness_score, reverse=True) for species in self.species]
+            species_adjusted_fitness = [sum(g.adjusted_fitness for g in species) for species in self.species]
+
+            # the best genotype and the best species_elitism of every species are copied unchanged
+            elites = [best_genotype]
+            species_elitism = self.config.species_elitism
+            for ranked in ranked_species:
+                elites.extend(g for g in ranked[:species_elitism] if g is not best_genotype)
+            for genotype in elites[:self.population_size]:
+                new_population.append(crossover(genotype, genotype))
+            num_elites = len(new_population)
+
+            quotas = self.offspring_quotas(species_adjusted_fitness, self.population_size - len(new_population))
+            for ranked, quota in zip(ranked_species, quotas):
+                for _ in range(quota):
+                    new_population.append(self.breed_in_species(ranked, weights=False, rng=rng))
+
+        # the weights of all children are mutated in one batch
+        mutate_weights(new_population[num_elites:], rng)
 
         self.population = new_population
         self.generation += 1
+        self.innovations.new_generation()
+
+    def cull_stagnant_species(self, best_genotype):
+        """Record the best fitness of every species and drop the ones that stagnated.
+
+        A species stagnates when its best fitness has not improved for stagnation_limit
+        generations, the species of best_genotype is always kept.
+        """
+        species_best = {}
+        for species_id, species in zip(self.species_ids, self.species):
+            best = max(g.fitness_score for g in species)
+            previous = self.species_best.get(species_id)
+            species_best[species_id] = previous if previous is not None and best <= previous[0] else (best, self.generation)
+        self.species_best = species_best
+
+        stagnation_limit = self.config.stagnation_limit
+        if not stagnation_limit:
+            return
+        keep = [
+            i for i, (species_id, species) in enumerate(zip(self.species_ids, self.species))
+            if self.generation - species_best[species_id][1] < stagnation_limit
+            or any(g is best_genotype for g in species)
+        ]
+        self.species = [self.species[i] for i in keep]
+        self.species_representatives = [self.species_representatives[i] for i in keep]
+        self.species_ids = [self.species_ids[i] for i in keep]
+
+    def offspring_quotas(self, species_adjusted_fitness, num_offspring):
+        """Split num_offspring between the species in proportion to their adjusted fitness.
+
+        Largest remainder rounding, species with a negative total get no share.
+        Without any positive total every species gets the same share.
+        """
+        shares = [max(total, 0.0) for total in species_adjusted_fitness]
+        total = sum(shares)
+        if total <= 0:
+            shares = [1.0] * len(shares)
+            total = float(len(shares))
+
+        exact = [num_offspring * share / total for share in shares]
+        quotas = [int(quota) for quota in exact]
+        by_remainder = sorted(range(len(exact)), key=lambda i: exact[i] - quotas[i], reverse=True)
+        for i in by_remainder[:num_offspring - sum(quotas)]:
+            quotas[i] += 1
+        return quotas
+
+    def breed_in_species(self, ranked, weights=True, rng=random):
+        """Mutated child of the species champion and a random other member, ranked is sorted best first.
+
+        weights=False leaves the weight mutation to the caller, see Genotype.mutate.
+        """
+        strong = ranked[0]
+        weak = rng.choice(ranked[1:]) if len(ranked) > 1 else strong
+        child = crossover(strong, weak, rng)
+        child.mutate(weights, rng)
+        return child
+
+    def breed_from_species(self, species_adjusted_fitness, total_adjusted_fitness, species=None, rng=random):
+        """Pick a species by adjusted fitness and return (mutated child, species index).
+
+        species defaults to self.species, the steady state mode passes the evaluated members only.
+        """
+        if species is None:
+            species = self.species
+
+        if total_adjusted_fitness > 0:
+            rand_val = rng.uniform(0, total_adjusted_fitness)
+            cumulative = 0
+            selected_species_idx = 0
+            for i, species_fitness in enumerate(species_adjusted_fitness):
+                cumulative += species_fitness
+                if rand_val <= cumulative:
+                    selected_species_idx = i
+                    break
+        else:
+            selected_species_idx = rng.randint(0, len(species) - 1)
 
-    def select_parents(self):
-
-        sorted_pop = sorted(self.population, key=lambda g: g.fitness_score, reverse=True)
+        selected_species = species[selected_species_idx]
+        if selected_species:
+            ranked = sorted(selected_species, key=lambda g: g.fitness_score, reverse=True)
+            return self.breed_in_species(ranked, rng=rng), selected_species_idx
 
-        strong_parent = sorted_pop[0]
+        child = crossover(rng.choice(self.population), rng.choice(self.population), rng)
+        child.mutate(rng=rng)
+        return child, selected_species_idx
 
+    def select_parents(self, rng=random):
+        strong_parent = max(self.population, key=lambda g: g.fitness_score)
 
-        if self.species:
+        strong_species = None
+        for species in self.species:
+            if any(g is strong_parent for g in species):
+                strong_species = species
+                break
 
-            strong_species = None
-            for species in self.species:
-                if strong_parent in species:
-                    strong_species = species
-                    break
-            
-            if strong_species and len(strong_species) > 1:
-                weak_parent = random.choice([g for g in strong_species if g != strong_parent])
-            else:
-                weak_parent = random.choice(self.population)
+        if strong_species and len(strong_species) > 1:
+            weak_parent = rng.choice([g for g in strong_species if g is not strong_parent])
         else:
-            weak_parent = random.choice(self.population)
+            weak_parent = rng.choice(self.population)
 
         return strong_parent, weak_parent
 
     def evolve(self, fn_evaluate):
+        if self.config.evolution == "steady_state":
+            return evolve_steady_state(self, fn_evaluate)
+
         if len(self.population) == 0:
             self.init_population()
 
-        best_seen = None
-        gen_best_list = []
-        for _ in range(self.num_generations):
-            self.evaluate(fn_evaluate)
+        checkpoint_interval = self.config.checkpoint_interval
+        try:
+            # a resumed run continues from the generation stored in the checkpoint
+            while self.generation < self.num_generations:
+                self._emit("on_generation_start")
 
-            gen_best = max(self.population, key=lambda g: g.fitness_score)
-            if best_seen is None or gen_best.fitness_score > best_seen.fitness_score:
-                best_seen = gen_best
-            gen_best_list.append(gen_best)
+                start = time.perf_counter()
+                self.evaluate(fn_evaluate)
+                self._emit("on_evaluation", time.perf_counter() - start)
 
-            self.speciate()
-            
-            self.calculate_adjusted_fitness()
+                gen_best = max(self.population, key=lambda g: g.fitness_score)
+                if self.best_seen is None or gen_best.fitness_score > self.best_seen.fitness_score:
+                    self.best_seen = gen_best
+                self.history.add(self.generation, gen_best)
 
-            self.create_population()
+                start = time.perf_counter()
+                self.speciate()
+                self._emit("on_speciation", time.perf_counter() - start)
 
-        self.evaluate(fn_evaluate)
-        gen_best = max(self.population, key=lambda g: g.fitness_score)
-        if best_seen is None or gen_best.fitness_score > best_seen.fitness_score:
-            best_seen = gen_best
+                start = time.perf_counter()
+                self.calculate_adjusted_fitness()
+
+                self.create_population()
+                self._emit("on_reproduction", time.perf_counter() - start)
+
+                if checkpoint_interval and self.generation % checkpoint_interval == 0:
+                    self.save_checkpoint(self.config.checkpoint_path)
+
+                self._emit("on_generation_end")
+
+            self.evaluate(fn_evaluate)
+            gen_best = max(self.population, key=lambda g: g.fitness_score)
+            if self.best_seen is None or gen_best.fitness_score > self.best_seen.fitness_score:
+                self.best_seen = gen_best
+        finally:
+            self.close()
 
-        return best_seen, gen_best_list
\ No newline at end of file
+        return self.best_seen, self.history.entries()
\ No newline at end of file
@@ -0,0 +1,139 @@
+import numpy as np
+
+
+def _sigmoid(x):
+    with np.errstate(over="ignore"):
+        return 1.0 / (1.0 + np.exp(-x))
+
+
+class BatchNetwork:
+    """NumPy version of a Phenotype that evaluates many input rows per call.
+
+    Every layer reads the values of all the nodes before it (connections can
+    skip layers), so layer k is a (start_k, width_k) weight matrix applied to
+    values[:, :start_k]. Layers with connections inside the layer are split
+    into blocks. With sparse=True only the edge lists are kept and the weighted
+    sums are reduced per target node, which is cheaper for big sparse genomes.
+    """
+
+    def __init__(self, phenotype, sparse=False, dtype=np.float64):
+        self.num_inputs = phenotype.num_inputs
+        self.num_nodes = phenotype.num_nodes
+        self.output_start = phenotype.output_start
+        self.sparse = sparse
+        self.dtype = dtype
+
+        offsets = np.asarray(phenotype.edge_offsets, dtype=np.int64)
+        sources = np.asarray(phenotype.sources, dtype=np.int64)
+        weights = np.asarray(phenotype.weights, dtype=dtype)
+
+        self.layers = []
+        for start, end, activation in self._split_layers(phenotype):
+            activation = _sigmoid if activation is not None else None
+            lo, hi = offsets[start], offsets[end]
+            # local index of the target node of every edge in the layer
+            targets = np.repeat(np.arange(end - start), np.diff(offsets[start:end + 1]))
+
+            if sparse:
+                has_edges = np.diff(offsets[start:end + 1]) > 0
+                segment_starts = (offsets[start:end][has_edges] - lo)
+                self.layers.append(
+                    (start, end, activation, (sources[lo:hi], weights[lo:hi], segment_starts, has_edges))
+                )
+            else:
+                matrix = np.zeros((start, end - start), dtype=dtype)
+                np.add.at(matrix, (sources[lo:hi], targets), weights[lo:hi])
+                self.layers.append((start, end, activation, matrix))
+
+    @staticmethod
+    def _split_layers(phenotype):
+        """Split layers whose nodes read earlier nodes of the same layer, so every block is one matmul."""
+        offsets, sources = phenotype.edge_offsets, phenotype.sources
+        for start, end, activation in phenotype.layers:
+            block_start = start
+            for i in range(start, end):
+                if any(sources[e] >= block_start for e in range(offsets[i], offsets[i + 1])):
+                    yield block_start, i, activation
+                    block_start = i
+            yield block_start, end, activation
+
+    def layer_shape(self):
+        """Node count of every layer, networks with the same shape can be stacked."""
+        return (self.num_inputs,) + tuple(end - start for start, end, _, _ in self.layers)
+
+    def _prepare_values(self, inputs, leading_shape):
+        values = np.zeros(leading_shape + (self.num_nodes,), dtype=self.dtype)
+        num_inputs = min(inputs.shape[-1], self.num_inputs)
+        values[..., :num_inputs] = inputs[..., :num_inputs]
+        return values
+
+    def forward_batch(self, inputs):
+        """inputs has shape (N, input_nodes), returns the (N, output_nodes) outputs."""
+        inputs = np.asarray(inputs, dtype=self.dtype)
+        values = self._prepare_values(inputs, inputs.shape[:-1])
+
+        for start, end, activation, weights in self.layers:
+            if self.sparse:
+                sources, edge_weights, segment_starts, has_edges = weights
+                weighted_sum = np.zeros(values.shape[:-1] + (end - start,), dtype=self.dtype)
+                if len(sources):
+                    contributions = values[..., sources] * edge_weights
+                    weighted_sum[..., has_edges] = np.add.reduceat(contributions, segment_starts, axis=-1)
+            else:
+                weighted_sum = values[..., :start] @ weights
+
+            values[..., start:end] = activation(weighted_sum) if activation is not None else weighted_sum
+
+        return values[..., self.output_start:]
+
+
+class PopulationBatch:
+    """Evaluates many genotypes at once, genotypes with the same layer shape are stacked.
+
+    forward_batch takes inputs of shape (N, input_nodes) shared by every genotype or
+    (num_genotypes, N, input_nodes) with one set of rows per genotype (lockstep
+    environments) and returns (num_genotypes, N, output_nodes) in population order.
+    """
+
+    def __init__(self, genotypes, dtype=np.float64):
+        self.dtype = dtype
+        self.num_genotypes = len(genotypes)
+
+        networks = [BatchNetwork(g.compile(), dtype=dtype) for g in genotypes]
+        if len({n.num_nodes - n.output_start for n in networks}) > 1:
+            raise ValueError("All genotypes must have the same number of outputs")
+
+        groups = {}
+        for i, network in enumerate(networks):
+            groups.setdefault(network.layer_shape(), []).append(i)
+
+        self.groups = []
+        for indices in groups.values():
+            template = networks[indices[0]]
+            stacked = [
+                (start, end, activation, np.stack([networks[i].layers[k][3] for i in indices]))
+                for k, (start, end, activation, _) in enumerate(template.layers)
+            ]
+            self.groups.append((np.asarray(indices), template, stacked))
+
+        self.num_outputs = networks[0].num_nodes - networks[0].output_start if networks else 0
+
+    def forward_batch(self, inputs):
+        inputs = np.asarray(inputs, dtype=self.dtype)
+        rows = inputs.shape[-2]
+        outputs = np.empty((self.num_genotypes, rows, self.num_outputs), dtype=self.dtype)
+
+        for indices, template, layers in self.groups:
+            if inputs.ndim == 2:
+                group_inputs = np.broadcast_to(inputs, (len(indices),) + inputs.shape)
+            else:
+                group_inputs = inputs[indices]
+
+            values = template._prepare_values(group_inputs, (len(indices), rows))
+            for start, end, activation, weights in layers:
+                weighted_sum = np.matmul(values[..., :start], weights)
+                values[..., start:end] = activation(weighted_sum) if activation is not None else weighted_sum
+
+            outputs[indices] = values[..., template.output_start:]
+
+        return outputs
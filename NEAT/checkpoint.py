@@ -0,0 +1,249 @@
+import json
+import os
+import random
+import struct
+import sys
+from array import array
+
+from .config import Config
+from .genotype import Genotype
+from .node import HiddenNode, InputNode, OutputNode
+
+"""
+Binary checkpoint of a NEAT run. Everything is little endian and written one
+record at a time, so neither saving nor loading holds a pickled copy of the
+whole object graph:
+
+    magic, version
+    config          the run's Config as length prefixed JSON
+    run header      generation, compatibility threshold, number of genotype records
+    innovations     per_generation flag, next innovation number, (from id, to id, innov) table
+    rng             state of the random module
+    genotypes       one record per distinct genotype (population, representatives, species, history)
+    references      population / representatives / species / best seen / history as record indices
+    history         champion summaries (generation, fitness, connections, hidden nodes, hidden layers),
+                    length of the stream history file
+    species ids     next species id, id of every species, (species id, best fitness, generation) stagnation table
+"""
+
+MAGIC = b"NEATCKPT"
+VERSION = 1
+
+_RUN_HEADER = struct.Struct("<qdI")
+_INNOVATION_HEADER = struct.Struct("<?qI")
+_GENOTYPE_HEADER = struct.Struct("<ddqIIII")
+_COUNT = struct.Struct("<I")
+_INDEX = struct.Struct("<q")
+
+
+def _write_array(f, values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    f.write(values.tobytes())
+
+
+def _read_array(f, typecode, count):
+    values = array(typecode)
+    values.frombytes(f.read(values.itemsize * count))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _write_indices(f, indices):
+    f.write(_COUNT.pack(len(indices)))
+    _write_array(f, array("q", indices))
+
+
+def _read_indices(f):
+    (count,) = _COUNT.unpack(f.read(_COUNT.size))
+    return _read_array(f, "q", count)
+
+
+def write_genotype(f, genotype):
+    genes = genotype.connections
+    f.write(_GENOTYPE_HEADER.pack(
+        genotype.fitness_score, genotype.adjusted_fitness, genotype.next_node_id,
+        len(genotype.input_nodes), len(genotype.output_nodes), len(genotype.hidden_layers), len(genes),
+    ))
+    _write_array(f, array("q", [n.node_id for n in genotype.input_nodes]))
+    _write_array(f, array("q", [n.node_id for n in genotype.output_nodes]))
+    for layer in genotype.hidden_layers:
+        _write_indices(f, [n.node_id for n in layer])
+    _write_array(f, genes.innov_nums)
+    _write_array(f, genes.from_ids)
+    _write_array(f, genes.to_ids)
+    _write_array(f, genes.weights)
+    f.write(bytes(genes.enabled))
+
+
+def read_genotype(f, config=None, innovations=None):
+    fitness_score, adjusted_fitness, next_node_id, num_inputs, num_outputs, num_layers, num_genes = \
+        _GENOTYPE_HEADER.unpack(f.read(_GENOTYPE_HEADER.size))
+
+    genotype = Genotype(0, 0, config, innovations=innovations)
+    genotype.input_nodes = [InputNode(node_id) for node_id in _read_array(f, "q", num_inputs)]
+    genotype.output_nodes = [OutputNode(node_id) for node_id in _read_array(f, "q", num_outputs)]
+    genotype.hidden_layers = [
+        [HiddenNode(node_id, layer_index) for node_id in _read_indices(f)]
+        for layer_index in range(num_layers)
+    ]
+
+    genes = genotype.connections
+    genes.innov_nums = _read_array(f, "q", num_genes)
+    genes.from_ids = _read_array(f, "q", num_genes)
+    genes.to_ids = _read_array(f, "q", num_genes)
+    genes.weights = _read_array(f, "d", num_genes)
+    genes.enabled = bytearray(f.read(num_genes))
+
+    genotype.next_node_id = next_node_id
+    genotype.fitness_score = fitness_score
+    genotype.adjusted_fitness = adjusted_fitness
+    return genotype
+
+
+def _write_rng_state(f, state):
+    version, internal_state, gauss_next = state
+    f.write(struct.pack("<I", version))
+    f.write(_COUNT.pack(len(internal_state)))
+    _write_array(f, array("Q", internal_state))
+    f.write(struct.pack("<?d", gauss_next is not None, gauss_next or 0.0))
+
+
+def _read_rng_state(f):
+    (version,) = struct.unpack("<I", f.read(4))
+    (count,) = _COUNT.unpack(f.read(_COUNT.size))
+    internal_state = tuple(_read_array(f, "Q", count))
+    has_gauss, gauss_next = struct.unpack("<?d", f.read(struct.calcsize("<?d")))
+    return version, internal_state, gauss_next if has_gauss else None
+
+
+def save_checkpoint(neat, path):
+    """Write the run state of neat to path, the file is replaced atomically."""
+    # every genotype is written once, the run state refers to them by record index
+    records = {}
+    for genotype in (
+        neat.population + neat.species_representatives
+        + [g for species in neat.species for g in species]
+        + ([neat.best_seen] if neat.best_seen is not None else []) + neat.history.genotypes
+    ):
+        records.setdefault(id(genotype), genotype)
+    index_of = {key: i for i, key in enumerate(records)}
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<H", VERSION))
+        config = json.dumps(neat.config.to_dict()).encode()
+        f.write(_COUNT.pack(len(config)))
+        f.write(config)
+        f.write(_RUN_HEADER.pack(neat.generation, neat.compatibility_threshold, len(records)))
+
+        innovations = neat.innovations.innovations
+        f.write(_INNOVATION_HEADER.pack(
+            neat.innovations.per_generation, neat.innovations.next_innov_num, len(innovations)
+        ))
+        _write_array(f, array("q", [from_id for from_id, _ in innovations]))
+        _write_array(f, array("q", [to_id for _, to_id in innovations]))
+        _write_array(f, array("q", innovations.values()))
+
+        _write_rng_state(f, random.getstate())
+
+        for genotype in records.values():
+            write_genotype(f, genotype)
+
+        _write_indices(f, [index_of[id(g)] for g in neat.population])
+        _write_indices(f, [index_of[id(g)] for g in neat.species_representatives])
+        f.write(_COUNT.pack(len(neat.species)))
+        for species in neat.species:
+            _write_indices(f, [index_of[id(g)] for g in species])
+        f.write(_INDEX.pack(index_of[id(neat.best_seen)] if neat.best_seen is not None else -1))
+        _write_indices(f, [index_of[id(g)] for g in neat.history.genotypes])
+
+        history = neat.history
+        f.write(_COUNT.pack(len(history)))
+        _write_array(f, history.generations)
+        _write_array(f, history.fitness)
+        _write_array(f, history.connections)
+        _write_array(f, history.hidden_nodes)
+        _write_array(f, history.hidden_layers)
+        f.write(_INDEX.pack(history.stream_length()))
+
+        f.write(_INDEX.pack(neat.next_species_id))
+        _write_indices(f, neat.species_ids)
+        species_best = neat.species_best
+        f.write(_COUNT.pack(len(species_best)))
+        _write_array(f, array("q", species_best))
+        _write_array(f, array("d", [best for best, _ in species_best.values()]))
+        _write_array(f, array("q", [generation for _, generation in species_best.values()]))
+
+    os.replace(tmp_path, path)
+
+
+def _read_header(f, path):
+    """Check magic and version, returns the config dict."""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{path} is not a NEAT checkpoint")
+    (version,) = struct.unpack("<H", f.read(2))
+    if version != VERSION:
+        raise ValueError(f"Unsupported checkpoint version {version}")
+    (length,) = _COUNT.unpack(f.read(_COUNT.size))
+    return json.loads(f.read(length))
+
+
+def load_checkpoint_config(path):
+    """Config the checkpointed run was created with."""
+    with open(path, "rb") as f:
+        return Config.from_dict(_read_header(f, path))
+
+
+def load_checkpoint(neat, path):
+    """Restore the run state saved by save_checkpoint into neat, whose config is not changed."""
+    with open(path, "rb") as f:
+        _read_header(f, path)
+
+        generation, compatibility_threshold, num_records = _RUN_HEADER.unpack(f.read(_RUN_HEADER.size))
+
+        per_generation, next_innov_num, num_innovations = \
+            _INNOVATION_HEADER.unpack(f.read(_INNOVATION_HEADER.size))
+        from_ids = _read_array(f, "q", num_innovations)
+        to_ids = _read_array(f, "q", num_innovations)
+        innov_nums = _read_array(f, "q", num_innovations)
+        neat.innovations.per_generation = per_generation
+        neat.innovations.next_innov_num = next_innov_num
+        neat.innovations.innovations = dict(zip(zip(from_ids, to_ids), innov_nums))
+
+        random.setstate(_read_rng_state(f))
+
+        records = [read_genotype(f, neat.config, neat.innovations) for _ in range(num_records)]
+
+        neat.population = [records[i] for i in _read_indices(f)]
+        neat.species_representatives = [records[i] for i in _read_indices(f)]
+        (num_species,) = _COUNT.unpack(f.read(_COUNT.size))
+        neat.species = [[records[i] for i in _read_indices(f)] for _ in range(num_species)]
+        (best_index,) = _INDEX.unpack(f.read(_INDEX.size))
+        neat.best_seen = records[best_index] if best_index >= 0 else None
+        history = neat.history
+        history.genotypes = [records[i] for i in _read_indices(f)]
+
+        (history_length,) = _COUNT.unpack(f.read(_COUNT.size))
+        history.generations = _read_array(f, "q", history_length)
+        history.fitness = _read_array(f, "d", history_length)
+        history.connections = _read_array(f, "q", history_length)
+        history.hidden_nodes = _read_array(f, "q", history_length)
+        history.hidden_layers = _read_array(f, "q", history_length)
+        # champions streamed after the checkpoint are written again by the resumed run
+        (stream_length,) = _INDEX.unpack(f.read(_INDEX.size))
+        history.truncate_stream(stream_length)
+
+        (neat.next_species_id,) = _INDEX.unpack(f.read(_INDEX.size))
+        neat.species_ids = list(_read_indices(f))
+        (num_records,) = _COUNT.unpack(f.read(_COUNT.size))
+        species_ids = _read_array(f, "q", num_records)
+        best = _read_array(f, "d", num_records)
+        generations = _read_array(f, "q", num_records)
+        neat.species_best = {species_id: (b, g) for species_id, b, g in zip(species_ids, best, generations)}
+
+    neat.generation = generation
+    neat.compatibility_threshold = compatibility_threshold
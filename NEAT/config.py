@@ -1,21 +1,175 @@
+import json
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Optional, Union, get_args, get_origin
 
-config = {
-    "input_nodes": 5,
-    "output_nodes": 4,
-    "population_size": 50,
-    "perturbation_step": 0.1,
-    "weight_perturbation_rate": 0.8,
-    "weight_replace_rate": 0.2,
-    "disable_connection_rate": 0.1,
-    "new_connection_rate": 0.05,
-    "new_node_rate": 0.02,
-    "new_node_layer_rate": 0.002,
-    "num_generations": 3000,
-    "compatibility_threshold": 1.5,
-    "compatibility_disjoint_coefficient": 1,
-    "compatibility_weight_coefficient": 0.4,
-    "population_cut": 0.8
-}
 
+@dataclass(frozen=True)
+class Config:
+    """Settings of one NEAT run, validated once when created.
 
+    NEAT passes its Config to every genotype it creates, so runs with different
+    settings can share a process. Create one with Config.load, which starts from
+    the module level config dict.
+    """
 
+    input_nodes: int = 5
+    output_nodes: int = 4
+    population_size: int = 50
+    perturbation_step: float = 0.1  # standard deviation of the Gaussian weight perturbation
+    weight_perturbation_rate: float = 0.8
+    weight_replace_rate: float = 0.2
+    disable_connection_rate: float = 0.1
+    new_connection_rate: float = 0.05
+    new_node_rate: float = 0.02
+    new_node_layer_rate: float = 0.002
+    max_weight: Optional[float] = None  # weights are clamped to [-max_weight, max_weight] after mutation, None leaves them unbounded
+    num_generations: int = 3000
+    compatibility_threshold: float = 1.5
+    compatibility_disjoint_coefficient: float = 1
+    compatibility_weight_coefficient: float = 0.4
+    population_cut: float = 0.8
+    seed: Optional[int] = None  # seeds the random streams of the run (see rng.RandomStreams), None uses the random module
+    species_elitism: int = 0  # best genotypes of every species copied unchanged, the overall best always is
+    stagnation_limit: int = 0  # generations without improvement before a species stops reproducing, 0 disables it
+    evolution: str = "generational"  # generational or steady_state (replace the worst genotype as each evaluation finishes)
+    steady_state_in_flight: Optional[int] = None  # evaluations kept running in steady_state mode, None uses the evaluator's worker count
+    evaluator: str = "serial"  # serial, thread, process, distributed or population (fn_eval scores the whole population)
+    num_workers: Optional[int] = None  # None lets the pool pick the number of cpus, local worker processes for distributed
+    evaluator_chunksize: int = 1
+    distributed_address: str = "127.0.0.1:0"  # host:port or unix:/path the coordinator listens on, port 0 picks a free one
+    distributed_max_in_flight: int = 2  # tasks sent to a worker before it returns results
+    distributed_heartbeat_interval: float = 1.0
+    distributed_heartbeat_timeout: float = 10.0  # seconds without a message before a worker counts as lost
+    distributed_max_retries: int = 3
+    distributed_straggler_timeout: float = 5.0  # seconds before a running task is duplicated on an idle worker
+    innovation_tracking: str = "run"  # run: one number per (from, to) for the whole run, generation: per generation like the paper
+    reset_innovations: bool = True  # the run gets its own innovation registry, False shares the process wide one
+    speciation: str = "first_fit"  # first_fit, matrix (first fit on a NumPy distance matrix) or kmedoids
+    target_species: Optional[int] = None  # species count the threshold is tuned towards, also the k of kmedoids
+    compatibility_threshold_step: float = 0.1
+    compatibility_threshold_min: float = 0.1
+    kmedoids_iterations: int = 20
+    checkpoint_interval: int = 0  # save a checkpoint every n generations, 0 disables it
+    checkpoint_path: str = "neat_checkpoint.bin"
+    fidelity_budgets: Optional[tuple] = None  # increasing evaluation budgets (e.g. snake steps) of successive halving, None evaluates once
+    fidelity_keep: float = 0.5  # fraction of the genotypes promoted to the next budget
+    episodes: int = 1  # episodes per evaluation, above 1 fn_eval returns one score per episode seed (genotype.episode_seeds)
+    episode_confidence: float = 0.95  # confidence level of the EpisodeStats bounds
+    fitness_cache_size: int = 0  # LRU fitness cache size for deterministic fitness functions, 0 disables it
+    stats_path: Optional[str] = None  # per generation stats log written by hooks.StatsCollector, None disables it
+    stats_format: str = "jsonl"  # jsonl or csv
+    history: str = "full"  # full, summary, top_k or stream, see history.RunHistory
+    history_top_k: int = 10
+    history_path: str = "neat_history.bin"  # champions file of the stream history
+
+    choices = {
+        "evolution": ("generational", "steady_state"),
+        "evaluator": ("serial", "thread", "process", "distributed", "population"),
+        "innovation_tracking": ("run", "generation"),
+        "speciation": ("first_fit", "matrix", "kmedoids"),
+        "stats_format": ("jsonl", "csv"),
+        "history": ("full", "summary", "top_k", "stream"),
+    }
+
+    def __post_init__(self):
+        if isinstance(self.fidelity_budgets, list):
+            object.__setattr__(self, "fidelity_budgets", tuple(self.fidelity_budgets))
+        for field in fields(self):
+            _check_type(field.name, getattr(self, field.name), field.type)
+
+        for name, allowed in self.choices.items():
+            if getattr(self, name) not in allowed:
+                raise ValueError(f"{name} must be one of {', '.join(allowed)}, got {getattr(self, name)!r}")
+        for name in ("weight_perturbation_rate", "weight_replace_rate", "disable_connection_rate",
+                     "new_connection_rate", "new_node_rate", "new_node_layer_rate", "population_cut"):
+            if not 0 <= getattr(self, name) <= 1:
+                raise ValueError(f"{name} must be between 0 and 1, got {getattr(self, name)}")
+        for name in ("input_nodes", "output_nodes", "population_size", "evaluator_chunksize", "history_top_k",
+                     "episodes"):
+            if getattr(self, name) < 1:
+                raise ValueError(f"{name} must be at least 1, got {getattr(self, name)}")
+        for name in ("num_generations", "species_elitism", "stagnation_limit", "checkpoint_interval",
+                     "fitness_cache_size", "kmedoids_iterations", "distributed_max_retries"):
+            if getattr(self, name) < 0:
+                raise ValueError(f"{name} must not be negative, got {getattr(self, name)}")
+        if self.perturbation_step < 0:
+            raise ValueError(f"perturbation_step must not be negative, got {self.perturbation_step}")
+        if self.max_weight is not None and self.max_weight <= 0:
+            raise ValueError(f"max_weight must be positive, got {self.max_weight}")
+        if self.compatibility_threshold <= 0:
+            raise ValueError(f"compatibility_threshold must be positive, got {self.compatibility_threshold}")
+        if self.speciation == "kmedoids" and self.target_species is None:
+            raise ValueError("kmedoids speciation needs target_species to be set")
+        if self.fidelity_budgets is not None:
+            budgets = self.fidelity_budgets
+            if not budgets or any(not isinstance(b, int) or isinstance(b, bool) or b < 1 for b in budgets):
+                raise ValueError(f"fidelity_budgets must be positive integers, got {budgets}")
+            if any(a >= b for a, b in zip(budgets, budgets[1:])):
+                raise ValueError(f"fidelity_budgets must be increasing, got {budgets}")
+            if self.evolution != "generational":
+                raise ValueError("fidelity_budgets needs generational evolution")
+        if not 0 < self.episode_confidence < 1:
+            raise ValueError(f"episode_confidence must be between 0 and 1, got {self.episode_confidence}")
+        if not 0 < self.fidelity_keep <= 1:
+            raise ValueError(f"fidelity_keep must be in (0, 1], got {self.fidelity_keep}")
+        if self.history == "stream" and not self.history_path:
+            raise ValueError("The stream history needs history_path to be set")
+
+    @classmethod
+    def from_dict(cls, values):
+        unknown = set(values) - {field.name for field in fields(cls)}
+        if unknown:
+            raise ValueError(f"Unknown config keys: {', '.join(sorted(unknown))}")
+        return cls(**values)
+
+    @classmethod
+    def load(cls, path=None, **overrides):
+        """Config of the module level config dict, updated from a JSON or TOML file at path and then overrides."""
+        values = dict(config)
+        if path is not None:
+            if str(path).endswith(".toml"):
+                import tomllib
+                with open(path, "rb") as f:
+                    values.update(tomllib.load(f))
+            else:
+                with open(path) as f:
+                    values.update(json.load(f))
+        values.update(overrides)
+        return cls.from_dict(values)
+
+    def replace(self, **overrides):
+        """Copy with some settings changed, validated like a new Config."""
+        return replace(self, **overrides)
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def _check_type(name, value, expected):
+    allowed = get_args(expected) if get_origin(expected) is Union else (expected,)
+    if float in allowed:
+        allowed += (int,)
+    # bool is an int, but True is no valid population size
+    if isinstance(value, allowed) and (bool in allowed or not isinstance(value, bool)):
+        return
+    names = " or ".join("None" if t is type(None) else t.__name__ for t in allowed if t is not int or float not in allowed)
+    raise TypeError(f"{name} must be {names}, got {value!r}")
+
+
+"""
+Process wide defaults, Config.load (and so every NEAT run created without a
+Config) starts from this dict. Changing it does not affect runs already created.
+"""
+config = Config().to_dict()
+
+_default_config = None
+_default_values = None
+
+
+def default_config():
+    """Config of the module level config dict, shared until the dict changes."""
+    global _default_config, _default_values
+    if _default_config is None or config != _default_values:
+        _default_config = Config.from_dict(config)
+        _default_values = dict(config)
+    return _default_config
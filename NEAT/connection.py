@@ -1,44 +1,124 @@
 import random
+from array import array
+from bisect import bisect_right
 
-from .config import config
+from .innovation import innovation_registry
 
 
-class Connection:
-    _innov_num_counter = 0
-    connection_list = []
+def random_weight(rng=random):
+    return rng.uniform(-1, 1)
 
-    def __init__(self, from_node, to_node, innov_num):
-        self.from_to = (from_node, to_node)
 
-        self.disabled = False
-        self.weight = random.uniform(-1, 1)
+class ConnectionGenes:
+    """Connection genes of a genotype stored as parallel arrays sorted by innovation number.
 
-        self.innov_num = None
+    Gene i is the connection from_ids[i] -> to_ids[i] (node ids) with
+    innovation number innov_nums[i], weight weights[i] and enabled[i] (0 or 1).
 
+    The arrays can be shared with other ConnectionGenes (see share), they are
+    copied on the first write. The structure (innov_nums, from_ids, to_ids,
+    enabled) and the weights are copied separately, so a child whose weights
+    are mutated keeps sharing the structure of its parent.
+    """
 
-        if innov_num == None:
-            self.innov_num = Connection._innov_num_counter
-            Connection._innov_num_counter += 1
-            Connection.connection_list.append(self)
-        else:
-            self.innov_num = innov_num
-
-    def forward(self, value):
-        return value*self.weight
-
-
-    def perturbate_weight(self):
-        self.weight = self.weight + config.get("perturbation_step")
+    __slots__ = ("innov_nums", "from_ids", "to_ids", "weights", "enabled", "shared_structure", "shared_weights")
 
-    def replace_weight(self):
-        self.weight = random.uniform(-1, 1)
+    def __init__(self):
+        self.innov_nums = array("q")
+        self.from_ids = array("q")
+        self.to_ids = array("q")
+        self.weights = array("d")
+        self.enabled = bytearray()
+        self.shared_structure = False
+        self.shared_weights = False
 
+    def __len__(self):
+        return len(self.innov_nums)
 
+    def add(self, from_id, to_id, innov_num=None, weight=None, enabled=True, rng=random, innovations=None):
+        """Insert a gene keeping the innovation order, returns its index.
 
+        A new innov_num comes from the innovations registry of the run, the process wide one by default.
+        """
+        if innov_num is None:
+            innov_num = (innovations if innovations is not None else innovation_registry).get_innovation(from_id, to_id)
+        if weight is None:
+            weight = random_weight(rng)
+        self.own_structure()
+        self.own_weights()
 
-def same_connection(from_node, to_node, connection2):
-    if (from_node, to_node) == connection2.from_to:
-        return True
-    return False
-
-
+        if not self.innov_nums or innov_num >= self.innov_nums[-1]:
+            index = len(self.innov_nums)
+        else:
+            index = bisect_right(self.innov_nums, innov_num)
+
+        self.innov_nums.insert(index, innov_num)
+        self.from_ids.insert(index, from_id)
+        self.to_ids.insert(index, to_id)
+        self.weights.insert(index, weight)
+        self.enabled.insert(index, 1 if enabled else 0)
+        return index
+
+    def copy(self):
+        genes = ConnectionGenes()
+        genes.innov_nums = array("q", self.innov_nums)
+        genes.from_ids = array("q", self.from_ids)
+        genes.to_ids = array("q", self.to_ids)
+        genes.weights = array("d", self.weights)
+        genes.enabled = bytearray(self.enabled)
+        return genes
+
+    def share(self, weights=True):
+        """Genes using the same arrays, both sides copy them before writing.
+
+        With weights=False only the structure is shared and the weights are copied right away.
+        """
+        genes = ConnectionGenes()
+        genes.innov_nums = self.innov_nums
+        genes.from_ids = self.from_ids
+        genes.to_ids = self.to_ids
+        genes.enabled = self.enabled
+        self.shared_structure = genes.shared_structure = True
+        if weights:
+            genes.weights = self.weights
+            self.shared_weights = genes.shared_weights = True
+        else:
+            genes.weights = array("d", self.weights)
+        return genes
+
+    def own_structure(self):
+        if self.shared_structure:
+            self.innov_nums = array("q", self.innov_nums)
+            self.from_ids = array("q", self.from_ids)
+            self.to_ids = array("q", self.to_ids)
+            self.enabled = bytearray(self.enabled)
+            self.shared_structure = False
+
+    def own_weights(self):
+        if self.shared_weights:
+            self.weights = array("d", self.weights)
+            self.shared_weights = False
+
+    def disable(self, index):
+        self.own_structure()
+        self.enabled[index] = 0
+
+    def perturbate_weight(self, index, sigma, rng=random):
+        self.own_weights()
+        self.weights[index] += rng.gauss(0.0, sigma)
+
+    def replace_weight(self, index, rng=random):
+        self.own_weights()
+        self.weights[index] = random_weight(rng)
+
+    def clamp_weights(self, limit):
+        if any(w < -limit or w > limit for w in self.weights):
+            self.weights = array("d", [min(max(w, -limit), limit) for w in self.weights])
+            self.shared_weights = False
+
+    def set_weights(self, values):
+        """Replace every weight with the values of a float64 NumPy array."""
+        weights = array("d")
+        weights.frombytes(values.tobytes())
+        self.weights = weights
+        self.shared_weights = False
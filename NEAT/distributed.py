@@ -0,0 +1,383 @@
+"""
+Distributed evaluation: a coordinator ships compact genotypes to worker
+processes over TCP or a Unix socket and gathers the fitness scores.
+
+Messages are length prefixed pickles, so only connect workers you trust.
+    coordinator -> worker   ("init", fn_eval, config), ("task", task_id, compact genotype), ("shutdown",)
+    worker -> coordinator   ("hello", name), ("heartbeat",), ("result", task_id, score), ("error", task_id, text)
+
+Start a remote worker with:  python -m NEAT.distributed HOST:PORT  (or unix:/path/to/socket)
+fn_eval has to be importable on the worker, a module level function.
+"""
+import multiprocessing
+import os
+import pickle
+import queue
+import socket
+import struct
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from .genotype import Genotype
+
+_LENGTH = struct.Struct("<I")
+
+
+def parse_address(address):
+    """"host:port" for TCP or "unix:/path" for a Unix socket, returns (family, address)."""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def format_address(family, address):
+    if family == socket.AF_UNIX:
+        return f"unix:{address}"
+    return f"{address[0]}:{address[1]}"
+
+
+def send_message(sock, message):
+    data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_LENGTH.pack(len(data)) + data)
+
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data.extend(chunk)
+    return bytes(data)
+
+
+def recv_message(sock):
+    """Next message from sock, None once the connection is closed."""
+    header = _recv_exact(sock, _LENGTH.size)
+    if header is None:
+        return None
+    (length,) = _LENGTH.unpack(header)
+    data = _recv_exact(sock, length)
+    return None if data is None else pickle.loads(data)
+
+
+def run_worker(address, heartbeat_interval=1.0):
+    """Worker loop: evaluate tasks one at a time until the coordinator shuts it down."""
+    family, sock_address = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.connect(sock_address)
+    send_lock = threading.Lock()
+    stopped = threading.Event()
+
+    def send(message):
+        with send_lock:
+            send_message(sock, message)
+
+    def heartbeat():
+        while not stopped.wait(heartbeat_interval):
+            try:
+                send(("heartbeat",))
+            except OSError:
+                return
+
+    send(("hello", f"{socket.gethostname()}:{os.getpid()}"))
+    threading.Thread(target=heartbeat, daemon=True).start()
+
+    fn_eval = config = None
+    try:
+        while True:
+            message = recv_message(sock)
+            if message is None or message[0] == "shutdown":
+                break
+            if message[0] == "init":
+                _, fn_eval, config = message
+            elif message[0] == "task":
+                _, task_id, data = message
+                try:
+                    score = fn_eval(Genotype.from_compact(data, config))
+                except Exception:
+                    send(("error", task_id, traceback.format_exc()))
+                else:
+                    send(("result", task_id, score))
+    finally:
+        stopped.set()
+        sock.close()
+
+
+class _RemoteWorker:
+    def __init__(self, worker_id, sock):
+        self.worker_id = worker_id
+        self.sock = sock
+        self.name = None
+        self.in_flight = {}  # task id -> time it was sent
+        self.last_seen = time.monotonic()
+        self.fn_eval = None  # fn_eval this worker was initialised with
+
+
+class DistributedEvaluator:
+    """Evaluator that farms genotypes out to socket connected workers.
+
+    Every worker holds at most max_in_flight tasks. Tasks of workers that
+    disconnect or miss heartbeats for heartbeat_timeout seconds are queued
+    again, up to max_retries times. When nothing is left to send, tasks
+    running longer than straggler_timeout are duplicated on idle workers and
+    the first result wins, so one slow worker does not stall the generation.
+    With local_workers > 0 that many worker processes are started on this machine.
+    """
+
+    def __init__(self, address="127.0.0.1:0", local_workers=0, max_in_flight=2,
+                 heartbeat_interval=1.0, heartbeat_timeout=10.0, max_retries=3, straggler_timeout=5.0,
+                 config=None):
+        self.address = address
+        self.local_workers = local_workers
+        self.max_in_flight = max_in_flight
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_retries = max_retries
+        self.straggler_timeout = straggler_timeout
+        self.config = config  # the run's Config, genotypes on the workers are rebuilt with it
+
+        self.listener = None
+        self.events = queue.Queue()
+        self.workers = {}
+        self.processes = []
+        self.fn_eval = None
+        self.next_worker_id = 0
+        self.next_task_id = 0
+
+    def _start(self):
+        if self.listener is not None:
+            return
+        family, sock_address = parse_address(self.address)
+        self.listener = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        elif os.path.exists(sock_address):
+            os.unlink(sock_address)
+        self.listener.bind(sock_address)
+        self.listener.listen()
+        self.address = format_address(family, self.listener.getsockname())
+
+        # workers are started before the accept thread, their connections wait in the backlog
+        for _ in range(self.local_workers):
+            process = multiprocessing.Process(target=run_worker, args=(self.address, self.heartbeat_interval), daemon=True)
+            process.start()
+            self.processes.append(process)
+
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except OSError:
+                return
+            worker_id = self.next_worker_id
+            self.next_worker_id += 1
+            self.events.put(("connect", worker_id, sock))
+            threading.Thread(target=self._read_loop, args=(worker_id, sock), daemon=True).start()
+
+    def _read_loop(self, worker_id, sock):
+        while True:
+            try:
+                message = recv_message(sock)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                message = None
+            if message is None:
+                self.events.put(("disconnect", worker_id, None))
+                return
+            self.events.put(("message", worker_id, message))
+
+    def _send(self, worker, message):
+        try:
+            send_message(worker.sock, message)
+            return True
+        except OSError:
+            return False
+
+    def _drop_worker(self, worker, state):
+        """Forget a dead worker and queue its unfinished tasks again."""
+        self.workers.pop(worker.worker_id, None)
+        try:
+            worker.sock.close()
+        except OSError:
+            pass
+        if state is not None:
+            for task_id in worker.in_flight:
+                state.retry(task_id)
+
+    def evaluate(self, fn_eval, population):
+        self._start()
+        if fn_eval is not self.fn_eval:
+            self.fn_eval = fn_eval
+            for worker in list(self.workers.values()):
+                self._init_worker(worker)
+
+        state = _Generation(self, population)
+        no_workers_since = None
+        while state.remaining:
+            # heartbeats queued while no evaluate was running (e.g. during reproduction) count
+            self._handle_queued_events(state)
+            self._check_heartbeats(state)
+
+            if self.workers:
+                no_workers_since = None
+            elif no_workers_since is None:
+                no_workers_since = time.monotonic()
+            elif time.monotonic() - no_workers_since > self.heartbeat_timeout:
+                raise RuntimeError(f"No evaluation worker connected to {self.address} for {self.heartbeat_timeout} seconds")
+
+            self._dispatch(state)
+            try:
+                event, worker_id, payload = self.events.get(timeout=self.heartbeat_interval)
+            except queue.Empty:
+                continue
+            self._handle_event(event, worker_id, payload, state)
+
+        return state.scores
+
+    def _handle_queued_events(self, state):
+        while True:
+            try:
+                event, worker_id, payload = self.events.get_nowait()
+            except queue.Empty:
+                return
+            self._handle_event(event, worker_id, payload, state)
+
+    def _init_worker(self, worker):
+        if self._send(worker, ("init", self.fn_eval, self.config)):
+            worker.fn_eval = self.fn_eval
+
+    def _handle_event(self, event, worker_id, payload, state):
+        if event == "connect":
+            worker = _RemoteWorker(worker_id, payload)
+            self.workers[worker_id] = worker
+            if self.fn_eval is not None:
+                self._init_worker(worker)
+            return
+
+        worker = self.workers.get(worker_id)
+        if worker is None:
+            return
+        if event == "disconnect":
+            self._drop_worker(worker, state)
+            return
+
+        worker.last_seen = time.monotonic()
+        kind = payload[0]
+        if kind == "hello":
+            worker.name = payload[1]
+        elif kind == "result":
+            _, task_id, score = payload
+            worker.in_flight.pop(task_id, None)
+            state.done(task_id, score)
+        elif kind == "error":
+            _, task_id, text = payload
+            worker.in_flight.pop(task_id, None)
+            state.retry(task_id, text)
+
+    def _check_heartbeats(self, state):
+        now = time.monotonic()
+        for worker in list(self.workers.values()):
+            if now - worker.last_seen > self.heartbeat_timeout:
+                self._drop_worker(worker, state)
+
+    def _dispatch(self, state):
+        now = time.monotonic()
+        for worker in list(self.workers.values()):
+            if worker.fn_eval is not self.fn_eval:
+                continue
+            while len(worker.in_flight) < self.max_in_flight:
+                task_id = state.next_task(worker, now)
+                if task_id is None:
+                    break
+                if not self._send(worker, ("task", task_id, state.payloads[task_id])):
+                    self._drop_worker(worker, state)
+                    state.retry(task_id)
+                    break
+                worker.in_flight[task_id] = now
+
+    def close(self):
+        for worker in list(self.workers.values()):
+            self._send(worker, ("shutdown",))
+            self._drop_worker(worker, None)
+        if self.listener is not None:
+            family = self.listener.family
+            sock_address = self.listener.getsockname()
+            self.listener.close()
+            self.listener = None
+            if family == socket.AF_UNIX and os.path.exists(sock_address):
+                os.unlink(sock_address)
+        for process in self.processes:
+            process.join(timeout=self.heartbeat_timeout)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        self.fn_eval = None
+        self.events = queue.Queue()
+
+
+class _Generation:
+    """Bookkeeping of the tasks of one evaluate call."""
+
+    def __init__(self, evaluator, population):
+        self.evaluator = evaluator
+        self.index = {}
+        self.payloads = {}
+        self.pending = deque()
+        for i, genotype in enumerate(population):
+            task_id = evaluator.next_task_id
+            evaluator.next_task_id += 1
+            self.index[task_id] = i
+            self.payloads[task_id] = genotype.to_compact()
+            self.pending.append(task_id)
+
+        self.scores = [None] * len(population)
+        self.finished = set()
+        self.attempts = {}
+        self.duplicated = set()
+        self.remaining = len(population)
+
+    def done(self, task_id, score):
+        if task_id not in self.index or task_id in self.finished:
+            return  # a duplicate or a task of an earlier generation
+        self.finished.add(task_id)
+        self.scores[self.index[task_id]] = score
+        self.remaining -= 1
+
+    def retry(self, task_id, error=None):
+        if task_id not in self.index or task_id in self.finished:
+            return
+        self.attempts[task_id] = self.attempts.get(task_id, 0) + 1
+        if self.attempts[task_id] > self.evaluator.max_retries:
+            raise RuntimeError(f"Evaluation of genotype {self.index[task_id]} failed:\n{error or 'worker lost'}")
+        self.pending.append(task_id)
+
+    def next_task(self, worker, now):
+        while self.pending:
+            task_id = self.pending.popleft()
+            if task_id not in self.finished:
+                return task_id
+
+        # nothing left to send, duplicate the oldest straggler of another worker
+        oldest = None
+        for other in self.evaluator.workers.values():
+            if other is worker:
+                continue
+            for task_id, sent in other.in_flight.items():
+                if (task_id in self.index and task_id not in self.finished and task_id not in self.duplicated
+                        and task_id not in worker.in_flight and now - sent > self.evaluator.straggler_timeout
+                        and (oldest is None or sent < oldest[1])):
+                    oldest = (task_id, sent)
+        if oldest is None:
+            return None
+        self.duplicated.add(oldest[0])
+        return oldest[0]
+
+
+if __name__ == "__main__":
+    run_worker(sys.argv[1])
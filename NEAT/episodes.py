@@ -0,0 +1,30 @@
+import math
+from statistics import NormalDist
+
+
+class EpisodeStats:
+    """Mean, variance and confidence bounds of the episode scores of one genotype.
+
+    The bounds are mean -/+ z * sqrt(variance / episodes) with the normal
+    quantile z of the confidence level, variance is the sample variance
+    (0 for a single episode).
+    """
+
+    def __init__(self, scores, confidence=0.95):
+        scores = [float(score) for score in scores]
+        if not scores:
+            raise ValueError("EpisodeStats needs at least one episode score")
+        self.episodes = len(scores)
+        self.mean = sum(scores) / self.episodes
+        self.variance = (
+            sum((score - self.mean) ** 2 for score in scores) / (self.episodes - 1) if self.episodes > 1 else 0.0
+        )
+        margin = NormalDist().inv_cdf(0.5 + confidence / 2) * math.sqrt(self.variance / self.episodes)
+        self.lower = self.mean - margin
+        self.upper = self.mean + margin
+
+    def __repr__(self):
+        return (
+            f"EpisodeStats(episodes={self.episodes}, mean={self.mean}, variance={self.variance}, "
+            f"lower={self.lower}, upper={self.upper})"
+        )
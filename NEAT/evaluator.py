@@ -0,0 +1,145 @@
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+from .config import default_config
+from .genotype import Genotype
+
+
+"""
+Besides evaluate, the serial and pool evaluators have submit(fn_eval, genotype)
+returning a concurrent.futures.Future, used by the steady state evolution, and
+max_in_flight, the number of evaluations worth keeping submitted at once
+"""
+class SerialEvaluator:
+    """Evaluates the population one genotype at a time in the calling process."""
+
+    max_in_flight = 1
+
+    def evaluate(self, fn_eval, population):
+        return [fn_eval(g) for g in population]
+
+    def submit(self, fn_eval, genotype):
+        future = Future()
+        try:
+            future.set_result(fn_eval(genotype))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def close(self):
+        pass
+
+
+class PopulationEvaluator:
+    """Hands the whole population to fn_eval in one call, for batched environments.
+
+    fn_eval(population) returns the scores in population order.
+    """
+
+    def evaluate(self, fn_eval, population):
+        return list(fn_eval(population))
+
+    def close(self):
+        pass
+
+
+class ThreadPoolEvaluator:
+    """Evaluates genotypes on a thread pool, fn_eval must be thread safe."""
+
+    def __init__(self, num_workers=None):
+        self.num_workers = num_workers
+        self.max_in_flight = num_workers or os.cpu_count() or 1
+        self.executor = None
+
+    def _executor(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.num_workers)
+        return self.executor
+
+    def evaluate(self, fn_eval, population):
+        return list(self._executor().map(fn_eval, population))
+
+    def submit(self, fn_eval, genotype):
+        return self._executor().submit(fn_eval, genotype)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+"""
+Worker side of the process pool, fn_eval and the run's config are sent once
+when the worker starts and genotypes are shipped in their compact tuple form
+"""
+_worker_fn_eval = None
+_worker_config = None
+
+
+def _init_worker(fn_eval, config):
+    global _worker_fn_eval, _worker_config
+    _worker_fn_eval = fn_eval
+    _worker_config = config
+
+
+def _evaluate_compact(data):
+    return _worker_fn_eval(Genotype.from_compact(data, _worker_config))
+
+
+class ProcessPoolEvaluator:
+    """Evaluates genotypes on a process pool that is kept alive across generations.
+
+    fn_eval has to be picklable (a module level function), the pool is only
+    recreated when a different fn_eval is passed.
+    """
+
+    def __init__(self, num_workers=None, chunksize=1, config=None):
+        self.num_workers = num_workers
+        self.max_in_flight = num_workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self.config = config
+        self.executor = None
+        self.fn_eval = None
+
+    def _executor(self, fn_eval):
+        if self.executor is None or fn_eval is not self.fn_eval:
+            self.close()
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.num_workers, initializer=_init_worker, initargs=(fn_eval, self.config)
+            )
+            self.fn_eval = fn_eval
+        return self.executor
+
+    def evaluate(self, fn_eval, population):
+        executor = self._executor(fn_eval)
+        compact = [g.to_compact() for g in population]
+        return list(executor.map(_evaluate_compact, compact, chunksize=self.chunksize))
+
+    def submit(self, fn_eval, genotype):
+        return self._executor(fn_eval).submit(_evaluate_compact, genotype.to_compact())
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+            self.fn_eval = None
+
+
+def create_evaluator(mode, num_workers=None, chunksize=1, config=None):
+    if mode == "serial":
+        return SerialEvaluator()
+    if mode == "population":
+        return PopulationEvaluator()
+    if mode == "thread":
+        return ThreadPoolEvaluator(num_workers)
+    config = config if config is not None else default_config()
+    if mode == "process":
+        return ProcessPoolEvaluator(num_workers, chunksize, config)
+    if mode == "distributed":
+        from .distributed import DistributedEvaluator
+        return DistributedEvaluator(
+            config.distributed_address, num_workers or 0, config.distributed_max_in_flight,
+            config.distributed_heartbeat_interval, config.distributed_heartbeat_timeout,
+            config.distributed_max_retries, config.distributed_straggler_timeout, config,
+        )
+    raise ValueError(f"Unknown evaluator mode: {mode}")
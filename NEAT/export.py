@@ -0,0 +1,56 @@
+import os
+import sys
+from array import array
+
+from .runtime import ACTIVATION_NONE, ACTIVATION_SIGMOID, HEADER, HEADER_SIZE, MAGIC, VERSION
+
+
+"""
+Writes the Phenotype of a genotype in the flat file format read by
+runtime.ExportedNetwork, see NEAT/runtime.py for the layout.
+"""
+
+
+def _aligned(offset):
+    return (offset + 7) // 8 * 8
+
+
+def _section_bytes(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def export_genotype(genotype, path):
+    """Write the network of genotype to path, the file is replaced atomically."""
+    phenotype = genotype.compile()
+    activations = array("B", [ACTIVATION_NONE] * phenotype.num_nodes)
+    for start, end, activation in phenotype.layers:
+        if activation is not None:
+            activations[start:end] = array("B", [ACTIVATION_SIGMOID] * (end - start))
+
+    sections = [
+        activations.tobytes(),
+        _section_bytes(array("i", phenotype.edge_offsets)),
+        _section_bytes(array("i", phenotype.sources)),
+        _section_bytes(array("d", phenotype.weights)),
+    ]
+    offsets = []
+    offset = HEADER_SIZE
+    for section in sections:
+        offsets.append(offset)
+        offset = _aligned(offset + len(section))
+
+    num_outputs = phenotype.num_nodes - phenotype.output_start
+    header = HEADER.pack(
+        MAGIC, VERSION, phenotype.num_inputs, num_outputs, phenotype.num_nodes, len(phenotype.sources), *offsets
+    )
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        for section_offset, section in zip(offsets, sections):
+            f.write(b"\0" * (section_offset - f.tell()))
+            f.write(section)
+    os.replace(tmp_path, path)
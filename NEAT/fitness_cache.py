@@ -0,0 +1,37 @@
+from collections import OrderedDict
+
+
+class FitnessCache:
+    """LRU cache of fitness scores keyed by NEAT.fitness_cache_key (Genotype.content_hash() and the episodes).
+
+    Only valid for deterministic fitness functions, the least recently used
+    entry is evicted once max_size scores are stored.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.scores = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.scores)
+
+    def get(self, key, default=None):
+        if key in self.scores:
+            self.scores.move_to_end(key)
+            self.hits += 1
+            return self.scores[key]
+        self.misses += 1
+        return default
+
+    def put(self, key, score):
+        self.scores[key] = score
+        self.scores.move_to_end(key)
+        if len(self.scores) > self.max_size:
+            self.scores.popitem(last=False)
+
+    def clear(self):
+        self.scores.clear()
+        self.hits = 0
+        self.misses = 0
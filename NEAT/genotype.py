@@ -1,28 +1,43 @@
 import random
+from array import array
+from hashlib import blake2b
+from itertools import compress
 from .node import HiddenNode, InputNode, OutputNode
-from .connection import same_connection
-from .connection import Connection
+from .connection import ConnectionGenes
 
-from .config import config
+from .config import default_config
+from .innovation import innovation_registry
+from .phenotype import compile_genotype
+from .topology import TopologyIndex
 
 
 class Genotype:
-    def __init__(self, input_nodes, output_nodes):
-        self.connections = []
+    def __init__(self, input_nodes, output_nodes, config=None, rng=random, innovations=None):
+        self.config = config if config is not None else default_config()  # shared by every genotype of a run
+        self.innovations = innovations if innovations is not None else innovation_registry  # the registry of the run
+        self.connections = ConnectionGenes()
         self.hidden_layers = []
-        self.dict_cache_connections = None
+        self.phenotype = None  # compiled network, reset whenever the genotype changes
+        self.gene_signature = None  # enabled (innov_nums, weights), reset whenever the genotype changes
+        self.gene_hash = None  # content hash, reset whenever the genotype changes
+        self.topology = None  # TopologyIndex, built on the first structural mutation
 
         self.next_node_id = 0
 
         self.input_nodes = self._create_nodes(input_nodes, InputNode)  # layer -1
         self.output_nodes = self._create_nodes(output_nodes, OutputNode)  # layer len(hidden_layers)
-        self._fully_connect_inputs_to_outputs()
+        self._fully_connect_inputs_to_outputs(rng)
 
         # fitness attributes
         self.hidden_layers = []
         self.fn_fitness = None # set after evaluate
         self.fitness_score = 0.0
         self.adjusted_fitness = 0.0  # Fitness after speciation sharing
+        self.eval_seed = None  # seed for the next evaluation, set by NEAT.evaluate in seeded runs
+        self.eval_budget = None  # budget of the next evaluation and the score it has to reach,
+        self.eval_cutoff = None  # both set by NEAT.evaluate_successive_halving
+        self.episode_seeds = None  # seeds of the episodes shared by the generation when config episodes > 1
+        self.fitness_stats = None  # episodes.EpisodeStats of the last multi episode evaluation
 
     def _next_node_id(self):
         node_id = self.next_node_id
@@ -37,16 +52,11 @@ class Genotype:
 
         return nodes
 
-    def _fully_connect_inputs_to_outputs(self):
+    def _fully_connect_inputs_to_outputs(self, rng=random):
         """Connect every input node to every output node, reusing innovation numbers."""
         for in_node in self.input_nodes:
             for out_node in self.output_nodes:
-                innov_num = None
-                for conn in Connection.connection_list:
-                    if same_connection(in_node, out_node, conn):
-                        innov_num = conn.innov_num
-                        break
-                self.connections.append(Connection(in_node, out_node, innov_num))
+                self.connections.add(in_node.node_id, out_node.node_id, rng=rng, innovations=self.innovations)
 
     def add_layer(self):
         self.hidden_layers.append([])
@@ -61,139 +71,127 @@ class Genotype:
         self.hidden_layers[layer_index].append(node)
         return node
 
-    def forward(self, input_values):
-        if self.dict_cache_connections is None:
-            self.dict_cache_connections = self.create_connection_cache()
-
-        incoming_connections = self.dict_cache_connections
-        node_values = {}
-
-        # stores input numbers to be processed later
-        for i, node in enumerate(self.input_nodes):
-            node_values[node] = input_values[i] if i < len(input_values) else 0.0
-
-        # process hidden layers and gets their weighted sum / activation function (sigmoid)
+    def compile(self):
+        """Return the frozen Phenotype of this genotype, it is rebuilt after every mutate."""
+        if self.phenotype is None:
+            self.phenotype = compile_genotype(self)
+        return self.phenotype
+
+    def export(self, path):
+        """Write the network to a file runtime.ExportedNetwork runs without this package."""
+        from .export import export_genotype
+        export_genotype(self, path)
+
+    def topology_index(self):
+        """TopologyIndex of the genotype, rebuilt when its genes or layers were replaced since the last mutate."""
+        if self.topology is None or not self.topology.is_current(self):
+            self.topology = TopologyIndex(self)
+        return self.topology
+
+    def node_layers(self):
+        """Map every node id to its layer, inputs are layer -1 and outputs len(hidden_layers)."""
+        layers = {n.node_id: -1 for n in self.input_nodes}
         for layer in self.hidden_layers:
-            for node in layer:
-                weighted_sum = 0.0
-                for from_node, conn in incoming_connections[node]:
-                    if from_node in node_values:
-                        weighted_sum += conn.forward(node_values[from_node])
-
-                node_values[node] = node.forward(weighted_sum)
-
-        # Process output layer
-        output_values = []
-        for node in self.output_nodes:
-            # Sum weighted inputs from incoming connections
-            weighted_sum = 0.0
-            for from_node, conn in incoming_connections[node]:
-                if from_node in node_values:
-                    weighted_sum += conn.forward(node_values[from_node])
-            # Apply activation function and store
-            output_values.append(node.forward(weighted_sum))
-
-        return output_values
-
-
-
-
-    def mutate(self):
-        if random.random() < config.get("new_connection_rate"):
-            from_node_layer = random.randint(-1, len(self.hidden_layers) - 1)
-            to_node_layer = random.randint(from_node_layer + 1, len(self.hidden_layers))
-
-            if from_node_layer == -1:
-                from_node = random.choice(self.input_nodes)
-            else:
-                # If chosen hidden layer is empty, skip this mutation attempt
-                if not self.hidden_layers or not self.hidden_layers[from_node_layer]:
-                    from_node = None
-                else:
-                    from_node = random.choice(self.hidden_layers[from_node_layer])
+            for n in layer:
+                layers[n.node_id] = n.layer
+        output_layer = len(self.hidden_layers)
+        for n in self.output_nodes:
+            layers[n.node_id] = output_layer
+        return layers
 
-            if to_node_layer == len(self.hidden_layers):
-                to_node = random.choice(self.output_nodes)
+    def forward(self, input_values):
+        return self.compile().forward(input_values)
+
+    def forward_batch(self, inputs):
+        """Forward pass for a (N, input_nodes) NumPy array, returns (N, output_nodes)."""
+        phenotype = self.compile()
+        if phenotype.batch_network is None:
+            from .batch import BatchNetwork
+            phenotype.batch_network = BatchNetwork(phenotype)
+        return phenotype.batch_network.forward_batch(inputs)
+
+    def signature(self):
+        """Innovation sorted (innov_nums, weights) of the enabled genes, cached until the next mutate."""
+        if self.gene_signature is None:
+            genes = self.connections
+            if all(genes.enabled):
+                self.gene_signature = (tuple(genes.innov_nums), tuple(genes.weights))
             else:
-                if not self.hidden_layers or not self.hidden_layers[to_node_layer]:
-                    to_node = None
-                else:
-                    to_node = random.choice(self.hidden_layers[to_node_layer])
-
-            if from_node is not None and to_node is not None:
-                connection_exists = any(same_connection(from_node, to_node, conn) for conn in self.connections)
-                if not connection_exists:
-                    innov_num = None
-                    for conn in Connection.connection_list:
-                        if same_connection(from_node, to_node, conn):
-                            innov_num = conn.innov_num
-                            break
-                    new_connection = Connection(from_node, to_node, innov_num)
-                    self.connections.append(new_connection)
-
-
-
-
-        if random.random() < config.get("new_node_rate"):
-            new_node_layer = random.randint(0, len(self.hidden_layers) - 1) if self.hidden_layers else 0
-
-            if random.random() < config.get("new_node_layer_rate"):
+                enabled = [i for i, e in enumerate(genes.enabled) if e]
+                self.gene_signature = (
+                    tuple(genes.innov_nums[i] for i in enabled),
+                    tuple(genes.weights[i] for i in enabled),
+                )
+        return self.gene_signature
+
+    def content_hash(self):
+        """Digest of the node layout and the enabled genes with their weights, cached until the next mutate.
+
+        Genotypes with the same hash compute the same network.
+        """
+        if self.gene_hash is None:
+            genes = self.connections
+            enabled = [i for i, e in enumerate(genes.enabled) if e]
+
+            digest = blake2b(digest_size=16)
+            digest.update(array("q", [n.node_id for n in self.input_nodes] + [-1]).tobytes())
+            digest.update(array("q", [n.node_id for n in self.output_nodes] + [-1]).tobytes())
+            for layer in self.hidden_layers:
+                digest.update(array("q", [n.node_id for n in layer] + [-1]).tobytes())
+            digest.update(array("q", [-2]).tobytes())
+            digest.update(array("q", [genes.innov_nums[i] for i in enabled]).tobytes())
+            digest.update(array("q", [genes.from_ids[i] for i in enabled]).tobytes())
+            digest.update(array("q", [genes.to_ids[i] for i in enabled]).tobytes())
+            digest.update(array("d", [genes.weights[i] for i in enabled]).tobytes())
+            self.gene_hash = digest.digest()
+        return self.gene_hash
+
+    def mutate(self, weights=True, rng=random):
+        """Structural mutations and then the weight mutation, which weights=False leaves to a batched mutate_weights."""
+        self.phenotype = None
+        self.gene_signature = None
+        self.gene_hash = None
+        config = self.config
+
+        if rng.random() < config.new_connection_rate:
+            topology = self.topology_index()
+            # only layers with nodes are drawn, so the attempt always finds a pair of nodes
+            from_node_layer = rng.choice(topology.source_layers())
+            to_node_layer = rng.choice(topology.target_layers(from_node_layer))
+
+            from_node = rng.choice(self.input_nodes if from_node_layer == -1 else self.hidden_layers[from_node_layer])
+            to_node = rng.choice(
+                self.output_nodes if to_node_layer == len(self.hidden_layers) else self.hidden_layers[to_node_layer]
+            )
+
+            if (from_node.node_id, to_node.node_id) not in topology.edges:
+                topology.add_gene(
+                    self.connections.add(from_node.node_id, to_node.node_id, rng=rng, innovations=self.innovations)
+                )
+
+        if rng.random() < config.new_node_rate:
+            new_node_layer = rng.randint(0, len(self.hidden_layers) - 1) if self.hidden_layers else 0
+
+            if rng.random() < config.new_node_layer_rate:
                 new_node_layer += 1
 
             new_node = self.add_node_to_layer(new_node_layer)
-
-            # Find connections from layer-1 to layer+1 to split
-            from_layer = new_node_layer - 1
-            to_layer = new_node_layer + 1
-
-            """
-            this part gets all the connections from the genotype and finds the ones
-            that have the same from_layer and to_layer
-            """
-
-            valid_connections = []
-            for conn in self.connections:
-                if conn.disabled:
-                    continue
-
-                from_node, to_node = conn.from_to
-
-                if isinstance(from_node, InputNode):
-                    from_node_layer = -1
-                elif isinstance(from_node, OutputNode):
-                    from_node_layer = len(self.hidden_layers)
-                else:  # HiddenNode
-                    from_node_layer = from_node.layer
-
-                if isinstance(to_node, InputNode):
-                    to_node_layer = -1
-                elif isinstance(to_node, OutputNode):
-                    to_node_layer = len(self.hidden_layers)
-                else:  # HiddenNode
-                    to_node_layer = to_node.layer
-
-                if from_node_layer == from_layer and to_node_layer == to_layer:
-                    valid_connections.append(conn)
-
-            # gets the random valid layer and splits it
-            if valid_connections:
-                conn = random.choice(valid_connections)
-                conn.disabled = True
-                new_conn1 = Connection(conn.from_to[0], new_node, None)
-                new_conn1.weight = 1.0
-                self.connections.append(new_conn1)
-                new_conn2 = Connection(new_node, conn.from_to[1], None)
-                new_conn2.weight = conn.weight
-                self.connections.append(new_conn2)
-
-
-
-        for conn in self.connections:
-            if random.random() < config.get("weight_perturbation_rate"):
-                conn.perturbate_weight()
-
-            if random.random() < config.get("weight_replace_rate"):
-                conn.replace_weight()
+            # a new layer moves the outputs, the index is then rebuilt
+            topology = self.topology_index()
+            topology.add_node(new_node)
+
+            # split a random enabled connection from layer-1 to layer+1
+            i = topology.pick_enabled(new_node_layer - 1, new_node_layer + 1, rng)
+            if i is not None:
+                genes = self.connections
+                topology.disable_gene(i)
+                genes.disable(i)
+                from_id, to_id, weight = genes.from_ids[i], genes.to_ids[i], genes.weights[i]
+                topology.add_gene(genes.add(from_id, new_node.node_id, weight=1.0, innovations=self.innovations))
+                topology.add_gene(genes.add(new_node.node_id, to_id, weight=weight, innovations=self.innovations))
+
+        if weights:
+            mutate_weights([self], rng)
 
     """
     Calculate the compatibility between 2 genotypes, thou in the paper compatibility is defined as:
@@ -204,140 +202,210 @@ class Genotype:
     
     Meaning it treats excess nodes and disjoints nodes as equal
     """
-    def compatibility_distance(self, other):
-
+    def compatibility_distance(self, other, threshold=None):
+        """
+        Single merge over the innovation sorted signatures. When threshold is given
+        the merge stops as soon as the disjoint/excess term alone reaches it, the
+        returned value is then only a lower bound that is >= threshold
+        """
+        c1 = self.config.compatibility_disjoint_coefficient
+        c3 = self.config.compatibility_weight_coefficient
+
+        self_innov, self_weights = self.signature()
+        other_innov, other_weights = other.signature()
+        num_self, num_other = len(self_innov), len(other_innov)
+
+        if not num_self and not num_other:
+            return 0.0
 
-        c1 = config.get("compatibility_disjoint_coefficient")
-        c3 = config.get("compatibility_weight_coefficient")
+        # Normalization factor
+        N = max(num_self, num_other, 1)
+        disjoint_scale = c1 / N
+
+        # at least the size difference is disjoint/excess
+        if threshold is not None and disjoint_scale * abs(num_self - num_other) >= threshold:
+            return disjoint_scale * abs(num_self - num_other)
+
+        i = j = 0
+        disjoint_excess = 0
+        matching = 0
+        weight_diff = 0.0
+        while i < num_self and j < num_other:
+            a, b = self_innov[i], other_innov[j]
+            if a == b:
+                weight_diff += abs(self_weights[i] - other_weights[j])
+                matching += 1
+                i += 1
+                j += 1
+            else:
+                disjoint_excess += 1
+                if a < b:
+                    i += 1
+                else:
+                    j += 1
+                if threshold is not None and disjoint_scale * disjoint_excess >= threshold:
+                    return disjoint_scale * disjoint_excess
 
-        # dict comprehension again
-        self_innov = {conn.innov_num: conn.weight for conn in self.connections if not conn.disabled}
-        other_innov = {conn.innov_num: conn.weight for conn in other.connections if not conn.disabled}
-        
-        if not self_innov and not other_innov:
-            return 0.0
-        
-        # Find matching and disjoint/excess genes (treated the same)
-        self_innov_nums = set(self_innov.keys())
-        other_innov_nums = set(other_innov.keys())
-        
-        matching = self_innov_nums & other_innov_nums
         # All non-matching genes (disjoint + excess treated the same)
-        disjoint_excess = (self_innov_nums - other_innov_nums) | (other_innov_nums - self_innov_nums)
-        
-        # Normalization factor
-        N = max(len(self_innov_nums), len(other_innov_nums), 1)
-        
+        disjoint_excess += (num_self - i) + (num_other - j)
+
         # Average weight difference of matching genes
-        if matching:
-            weight_diff = sum(abs(self_innov[n] - other_innov[n]) for n in matching)
-            avg_weight_diff = weight_diff / len(matching)
-        else:
-            avg_weight_diff = 0.0
-        
+        avg_weight_diff = weight_diff / matching if matching else 0.0
+
         # Calculate compatibility distance
-        distance = (c1 * len(disjoint_excess) / N) + (c3 * avg_weight_diff)
-        
+        distance = (disjoint_scale * disjoint_excess) + (c3 * avg_weight_diff)
+
         return distance
 
     """
-    Cache creator for forward pass, maps a Node to all of its incomming nodes and connections
+    Compact tuple form of the genotype used to ship it to other processes:
+    (input ids, output ids, hidden layers as (node id, ...), gene arrays (innov, from id, to id, weight, enabled),
+    (eval seed, eval budget, eval cutoff, episode seeds))
     """
-    def create_connection_cache(self):
-        incoming_connections = {}
-
-        for node in self.input_nodes:
-            incoming_connections[node] = []
-        for layer in self.hidden_layers:
-            for node in layer:
-                incoming_connections[node] = []
-        for node in self.output_nodes:
-            incoming_connections[node] = []
-
-        # Build the connection map - only iterate connections once
-        for conn in self.connections:
-            if conn.disabled:
-                continue
-            from_node, to_node = conn.from_to
-            if to_node in incoming_connections:
-                incoming_connections[to_node].append((from_node, conn))
-
-        return incoming_connections
-
-def crossover(strong_genotype: Genotype, weak_genotype: Genotype) -> Genotype:
+    def to_compact(self):
+        genes = self.connections
+        return (
+            tuple(n.node_id for n in self.input_nodes),
+            tuple(n.node_id for n in self.output_nodes),
+            tuple(tuple(n.node_id for n in layer) for layer in self.hidden_layers),
+            (genes.innov_nums, genes.from_ids, genes.to_ids, genes.weights, genes.enabled),
+            (self.eval_seed, self.eval_budget, self.eval_cutoff, self.episode_seeds),
+        )
+
+    @classmethod
+    def from_compact(cls, data, config=None):
+        input_ids, output_ids, hidden_ids, gene_arrays, evaluation = data
+
+        genotype = cls(0, 0, config)
+        genotype.input_nodes = [InputNode(node_id) for node_id in input_ids]
+        genotype.output_nodes = [OutputNode(node_id) for node_id in output_ids]
+        genotype.hidden_layers = [
+            [HiddenNode(node_id, layer_index) for node_id in layer]
+            for layer_index, layer in enumerate(hidden_ids)
+        ]
+
+        genes = genotype.connections
+        genes.innov_nums, genes.from_ids, genes.to_ids, genes.weights, genes.enabled = gene_arrays
+        genotype.connections = genes.copy()
+        genotype.eval_seed, genotype.eval_budget, genotype.eval_cutoff, genotype.episode_seeds = evaluation
+
+        node_ids = list(input_ids) + list(output_ids) + [node_id for layer in hidden_ids for node_id in layer]
+        genotype.next_node_id = max(node_ids, default=-1) + 1
+        return genotype
+
+"""
+Weight mutation of many genotypes at once, with the settings of the first one.
+Every weight is perturbed with probability weight_perturbation_rate by Gaussian
+noise (standard deviation perturbation_step), replaced by a new random weight
+with probability weight_replace_rate and clamped to [-max_weight, max_weight].
+From VECTORIZE_MIN_GENES genes on this runs as a few NumPy operations on the
+concatenated weight arrays, below that NumPy's call overhead would dominate.
+"""
+VECTORIZE_MIN_GENES = 48
+
+
+def mutate_weights(genotypes, rng=random):
+    genotypes = [g for g in genotypes if len(g.connections)]
+    if not genotypes:
+        return
+    config = genotypes[0].config
+    for genotype in genotypes:
+        genotype.phenotype = None
+        genotype.gene_signature = None
+        genotype.gene_hash = None
+
+    lengths = [len(g.connections) for g in genotypes]
+    if sum(lengths) < VECTORIZE_MIN_GENES:
+        for genotype in genotypes:
+            genes = genotype.connections
+            for i in range(len(genes)):
+                if rng.random() < config.weight_perturbation_rate:
+                    genes.perturbate_weight(i, config.perturbation_step, rng)
+
+                if rng.random() < config.weight_replace_rate:
+                    genes.replace_weight(i, rng)
+            if config.max_weight is not None:
+                genes.clamp_weights(config.max_weight)
+        return
+
+    import numpy as np
+    generator = np.random.default_rng(rng.getrandbits(64))
+    weights = np.concatenate([np.frombuffer(g.connections.weights, dtype=np.float64) for g in genotypes])
+
+    perturbed = generator.random(len(weights)) < config.weight_perturbation_rate
+    weights[perturbed] += generator.normal(0.0, config.perturbation_step, np.count_nonzero(perturbed))
+    replaced = generator.random(len(weights)) < config.weight_replace_rate
+    weights[replaced] = generator.uniform(-1, 1, np.count_nonzero(replaced))
+    if config.max_weight is not None:
+        np.clip(weights, -config.max_weight, config.max_weight, out=weights)
+
+    start = 0
+    for genotype, length in zip(genotypes, lengths):
+        genotype.connections.set_weights(weights[start:start + length])
+        start += length
+
+
+def crossover(strong_genotype: Genotype, weak_genotype: Genotype, rng=random) -> Genotype:
     """Return an offspring genotype built from the strong and weak parents."""
-    # Build connection maps, ignoring disabled links
-    strong_conn = {c.innov_num: c for c in strong_genotype.connections if not c.disabled}
-    weak_conn = {c.innov_num: c for c in weak_genotype.connections if not c.disabled}
-
-    all_innov = set(strong_conn) | set(weak_conn)
-    chosen_conns = []
-    for innov in sorted(all_innov):
-        if innov in strong_conn and innov in weak_conn:
-            chosen_conns.append(random.choice([strong_conn[innov], weak_conn[innov]]))
-        elif innov in strong_conn:
-            chosen_conns.append(strong_conn[innov])
-
-    # Collect all nodes referenced by chosen connections from both parents
-    def collect_nodes(genotype):
-        nodes = {n.node_id: n for n in genotype.input_nodes}
-        nodes.update({n.node_id: n for n in genotype.output_nodes})
-        for layer in genotype.hidden_layers:
-            for n in layer:
-                nodes[n.node_id] = n
-        return nodes
-
-    node_lookup = collect_nodes(strong_genotype)
-    node_lookup.update(collect_nodes(weak_genotype))
+    strong_genes = strong_genotype.connections
+    weak_genes = weak_genotype.connections
+
+    # Disabled links and genes only in the weak parent are dropped, matching
+    # genes take a random parent's weight. Without disabled links the child
+    # shares the gene arrays of the strong parent until either one writes them
+    if 0 not in strong_genes.enabled:
+        genes = strong_genes.share(weights=weak_genotype is strong_genotype)
+    else:
+        genes = ConnectionGenes()
+        genes.innov_nums = array("q", compress(strong_genes.innov_nums, strong_genes.enabled))
+        genes.from_ids = array("q", compress(strong_genes.from_ids, strong_genes.enabled))
+        genes.to_ids = array("q", compress(strong_genes.to_ids, strong_genes.enabled))
+        genes.weights = array("d", compress(strong_genes.weights, strong_genes.enabled))
+        genes.enabled = bytearray(b"\x01") * len(genes.innov_nums)
+
+    if weak_genotype is not strong_genotype:
+        weak_weights = dict(zip(
+            compress(weak_genes.innov_nums, weak_genes.enabled), compress(weak_genes.weights, weak_genes.enabled)
+        ))
+        weights = genes.weights
+        getrandbits = rng.getrandbits
+        for i, innov in enumerate(genes.innov_nums):
+            weak_weight = weak_weights.get(innov)
+            # a fair coin like rng.choice([weight, weak_weight]), same distribution but not the same random stream
+            if weak_weight is not None and getrandbits(1):
+                weights[i] = weak_weight
+
+    # Hidden nodes referenced by the chosen connections, a weak parent's node wins on an id collision
+    node_lookup = {n.node_id: n for layer in strong_genotype.hidden_layers for n in layer}
+    if weak_genotype is not strong_genotype:
+        node_lookup.update((n.node_id, n) for layer in weak_genotype.hidden_layers for n in layer)
+    referenced = set(genes.from_ids)
+    referenced.update(genes.to_ids)
 
     # Create offspring with zeroed counts to control node construction manually
-    offspring = Genotype(0, 0)
+    offspring = Genotype(0, 0, strong_genotype.config, innovations=strong_genotype.innovations)
 
-    # Clone input/output nodes following the strong parent's ordering
-    def clone_node(node):
-        if isinstance(node, InputNode):
-            return InputNode(node.node_id)
-        if isinstance(node, OutputNode):
-            return OutputNode(node.node_id)
-        return HiddenNode(node.node_id, node.layer)
-
-    offspring.input_nodes = [clone_node(n) for n in strong_genotype.input_nodes]
-    offspring.output_nodes = [clone_node(n) for n in strong_genotype.output_nodes]
+    # Nodes are immutable, the offspring shares them with its parents
+    offspring.input_nodes = list(strong_genotype.input_nodes)
+    offspring.output_nodes = list(strong_genotype.output_nodes)
 
     # Prepare hidden layers sized by max layer seen
-    hidden_nodes = [
-        clone_node(node_lookup[node_id])
-        for conn in chosen_conns
-        for node_id in (conn.from_to[0].node_id, conn.from_to[1].node_id)
-        if isinstance(node_lookup[node_id], HiddenNode)
-    ]
+    hidden_nodes = {node_id: n for node_id, n in node_lookup.items() if node_id in referenced}
     if hidden_nodes:
-        max_layer = max(n.layer for n in hidden_nodes)
+        max_layer = max(n.layer for n in hidden_nodes.values())
         offspring.hidden_layers = [[] for _ in range(max_layer + 1)]
-        for n in hidden_nodes:
+        for n in hidden_nodes.values():
             offspring.hidden_layers[n.layer].append(n)
 
-    # Clone connections to reference the offspring's nodes
-    id_to_node = {
-        n.node_id: n for n in offspring.input_nodes + offspring.output_nodes
-    }
-    for layer in offspring.hidden_layers:
-        for n in layer:
-            id_to_node[n.node_id] = n
-
-    offspring.connections = []
-    for conn in chosen_conns:
-        from_node, to_node = conn.from_to
-        new_conn = Connection(id_to_node[from_node.node_id], id_to_node[to_node.node_id], conn.innov_num)
-        new_conn.weight = conn.weight
-        new_conn.disabled = conn.disabled
-        offspring.connections.append(new_conn)
-
-    offspring.next_node_id = max(id_to_node.keys(), default=-1) + 1
-    offspring.dict_cache_connections = None
+    offspring.connections = genes
+
+    node_ids = [n.node_id for n in offspring.input_nodes + offspring.output_nodes]
+    offspring.next_node_id = max(node_ids + list(hidden_nodes), default=-1) + 1
+    offspring.phenotype = None
+    offspring.gene_signature = None
+    offspring.gene_hash = None
     offspring.fn_fitness = None
     offspring.fitness_score = 0.0
     offspring.adjusted_fitness = 0.0
 
     return offspring
-
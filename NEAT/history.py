@@ -0,0 +1,119 @@
+import os
+import struct
+from array import array
+
+from .checkpoint import read_genotype, write_genotype
+
+_GENERATION = struct.Struct("<q")
+
+
+class RunHistory:
+    """Per generation record of the champions of a run.
+
+    Every policy keeps a compact summary (fitness and size) of each generation's
+    champion in flat arrays. On top of that:
+        full    keeps every champion genotype (memory grows with the run)
+        summary keeps no genotypes
+        top_k   keeps the k best distinct champions (by content hash)
+        stream  appends every champion to a file at path, read it back with read_stream
+    """
+
+    summary_fields = ("generation", "fitness", "connections", "hidden_nodes", "hidden_layers")
+
+    def __init__(self, policy="full", top_k=10, path=None):
+        if policy not in ("full", "summary", "top_k", "stream"):
+            raise ValueError(f"Unknown history policy: {policy}")
+        if policy == "stream" and not path:
+            raise ValueError("The stream history policy needs a path")
+
+        self.policy = policy
+        self.top_k = top_k
+        self.path = path
+        self.file = None
+
+        self.generations = array("q")
+        self.fitness = array("d")
+        self.connections = array("q")
+        self.hidden_nodes = array("q")
+        self.hidden_layers = array("q")
+
+        self.genotypes = []  # full: one per generation, top_k: best first
+
+    def __len__(self):
+        return len(self.generations)
+
+    def add(self, generation, genotype):
+        self.generations.append(generation)
+        self.fitness.append(genotype.fitness_score)
+        self.connections.append(len(genotype.connections))
+        self.hidden_nodes.append(sum(len(layer) for layer in genotype.hidden_layers))
+        self.hidden_layers.append(len(genotype.hidden_layers))
+
+        if self.policy == "full":
+            self.genotypes.append(genotype)
+        elif self.policy == "top_k":
+            self._add_top_k(genotype)
+        elif self.policy == "stream":
+            if self.file is None:
+                self.file = open(self.path, "ab")
+            self.file.write(_GENERATION.pack(generation))
+            write_genotype(self.file, genotype)
+            self.file.flush()
+
+    def _add_top_k(self, genotype):
+        key = genotype.content_hash()
+        for i, kept in enumerate(self.genotypes):
+            if kept.content_hash() == key:
+                if genotype.fitness_score > kept.fitness_score:
+                    self.genotypes[i] = genotype
+                    self.genotypes.sort(key=lambda g: g.fitness_score, reverse=True)
+                return
+
+        if len(self.genotypes) < self.top_k or genotype.fitness_score > self.genotypes[-1].fitness_score:
+            self.genotypes.append(genotype)
+            self.genotypes.sort(key=lambda g: g.fitness_score, reverse=True)
+            del self.genotypes[self.top_k:]
+
+    def summaries(self):
+        return [
+            dict(zip(self.summary_fields, values))
+            for values in zip(self.generations, self.fitness, self.connections, self.hidden_nodes, self.hidden_layers)
+        ]
+
+    def entries(self):
+        """What evolve returns: the kept genotypes for full and top_k, the summaries otherwise."""
+        if self.policy in ("full", "top_k"):
+            return list(self.genotypes)
+        return self.summaries()
+
+    def stream_length(self):
+        """Bytes of the stream file written so far, 0 for the other policies."""
+        if self.policy != "stream":
+            return 0
+        if self.file is not None:
+            return self.file.tell()
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def truncate_stream(self, length):
+        """Drop what was streamed after length bytes, e.g. the champions written after a checkpoint."""
+        if self.policy != "stream":
+            return
+        self.close()
+        if os.path.exists(self.path) and os.path.getsize(self.path) > length:
+            os.truncate(self.path, length)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def read_stream(path, config=None):
+    """Yield (generation, genotype) for every champion written by the stream policy."""
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(_GENERATION.size)
+            if len(header) < _GENERATION.size:
+                return
+            (generation,) = _GENERATION.unpack(header)
+            yield generation, read_genotype(f, config)
@@ -0,0 +1,121 @@
+import csv
+import json
+import os
+import time
+
+
+class Hook:
+    """Base class of the NEAT.evolve callbacks, override the events you need.
+
+    The phase events get the wall time of the phase in seconds.
+    """
+
+    def on_generation_start(self, neat):
+        pass
+
+    def on_evaluation(self, neat, seconds):
+        pass
+
+    def on_speciation(self, neat, seconds):
+        pass
+
+    def on_reproduction(self, neat, seconds):
+        pass
+
+    def on_generation_end(self, neat):
+        pass
+
+    def close(self):
+        pass
+
+
+class StatsCollector(Hook):
+    """Writes one record per generation to a JSONL or CSV file.
+
+    Records the wall time of every phase, evaluations per second, genome
+    sizes, species count, fitness and the size of the innovation registry.
+    Multi episode runs also record the confidence bounds of the best genotype
+    and the mean episode variance, None otherwise.
+    The file is opened in append mode so a resumed run keeps its history.
+    """
+
+    fields = [
+        "generation", "evaluate_seconds", "speciate_seconds", "reproduce_seconds", "generation_seconds",
+        "evaluations", "evaluations_per_second", "best_fitness", "mean_fitness",
+        "best_fitness_lower", "best_fitness_upper", "mean_fitness_variance",
+        "mean_connections", "max_connections", "mean_hidden_nodes", "max_hidden_layers",
+        "species", "compatibility_threshold", "innovations",
+    ]
+
+    def __init__(self, path, log_format="jsonl"):
+        if log_format not in ("jsonl", "csv"):
+            raise ValueError(f"Unknown stats format: {log_format}")
+        self.path = path
+        self.log_format = log_format
+        self.file = None
+        self.writer = None
+        self.record = {}
+        self.generation_start = 0.0
+
+    def _open(self):
+        write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self.file = open(self.path, "a", newline="")
+        if self.log_format == "csv":
+            self.writer = csv.DictWriter(self.file, fieldnames=self.fields)
+            if write_header:
+                self.writer.writeheader()
+
+    def on_generation_start(self, neat):
+        self.generation_start = time.perf_counter()
+        self.record = {"generation": neat.generation}
+
+    def on_evaluation(self, neat, seconds):
+        population = neat.population
+        evaluations = neat.last_evaluations
+        connections = [len(g.connections) for g in population]
+        fitness = [g.fitness_score for g in population]
+        self.record.update(
+            evaluate_seconds=seconds,
+            evaluations=evaluations,
+            evaluations_per_second=evaluations / seconds if seconds > 0 else None,
+            best_fitness=float(max(fitness)),
+            mean_fitness=float(sum(fitness) / len(fitness)),
+            mean_connections=sum(connections) / len(connections),
+            max_connections=max(connections),
+            mean_hidden_nodes=sum(sum(len(layer) for layer in g.hidden_layers) for g in population) / len(population),
+            max_hidden_layers=max(len(g.hidden_layers) for g in population),
+        )
+        best = max(population, key=lambda g: g.fitness_score)
+        stats = [g.fitness_stats for g in population if g.fitness_stats is not None]
+        self.record.update(
+            best_fitness_lower=best.fitness_stats.lower if best.fitness_stats is not None else None,
+            best_fitness_upper=best.fitness_stats.upper if best.fitness_stats is not None else None,
+            mean_fitness_variance=sum(s.variance for s in stats) / len(stats) if stats else None,
+        )
+
+    def on_speciation(self, neat, seconds):
+        self.record.update(
+            speciate_seconds=seconds,
+            species=len(neat.species),
+            compatibility_threshold=neat.compatibility_threshold,
+        )
+
+    def on_reproduction(self, neat, seconds):
+        self.record.update(reproduce_seconds=seconds, innovations=len(neat.innovations))
+
+    def on_generation_end(self, neat):
+        self.record["generation_seconds"] = time.perf_counter() - self.generation_start
+        if self.file is None:
+            self._open()
+
+        if self.log_format == "csv":
+            self.writer.writerow(self.record)
+        else:
+            self.file.write(json.dumps(self.record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.writer = None
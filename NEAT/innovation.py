@@ -0,0 +1,37 @@
+class InnovationRegistry:
+    """Hands out innovation numbers for connections keyed by (from node id, to node id).
+
+    Only ids are stored, so genotypes that die can be garbage collected. With
+    per_generation=True the lookup table is cleared every generation like in the
+    original NEAT paper: the same structural mutation gets the same number inside
+    a generation, and a new one if it shows up again later.
+    """
+
+    def __init__(self, per_generation=False):
+        self.per_generation = per_generation
+        self.innovations = {}
+        self.next_innov_num = 0
+
+    def __len__(self):
+        return len(self.innovations)
+
+    def get_innovation(self, from_id, to_id):
+        key = (from_id, to_id)
+        innov_num = self.innovations.get(key)
+        if innov_num is None:
+            innov_num = self.next_innov_num
+            self.next_innov_num += 1
+            self.innovations[key] = innov_num
+        return innov_num
+
+    def new_generation(self):
+        if self.per_generation:
+            self.innovations.clear()
+
+    def reset(self):
+        """Forget every innovation, used to start an independent run."""
+        self.innovations.clear()
+        self.next_innov_num = 0
+
+
+innovation_registry = InnovationRegistry()
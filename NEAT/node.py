@@ -2,12 +2,20 @@ from enum import Enum, auto
 from .utils import sigmoid
 
 
+"""
+Nodes never change after they are created, so offspring share the node
+objects of their parents instead of cloning them
+"""
 class Node:
+    __slots__ = ("node_id",)
+
     def __init__(self, node_id):
         self.node_id = node_id
 
 
 class InputNode(Node):
+    __slots__ = ()
+
     def __init__(self, node_id):
         super().__init__(node_id)
 
@@ -15,6 +23,8 @@ class InputNode(Node):
         return value
 
 class HiddenNode(Node):
+    __slots__ = ("layer",)
+
     def __init__(self, node_id, layer):
         super().__init__(node_id)
         self.layer = layer
@@ -24,10 +34,10 @@ class HiddenNode(Node):
 
 
 class OutputNode(Node):
+    __slots__ = ()
+
     def __init__(self, node_id):
         super().__init__(node_id)
 
     def forward(self, value):
         return value  # Output nodes typically use identity/linear activation
-
-
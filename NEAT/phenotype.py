@@ -0,0 +1,85 @@
+from array import array
+from operator import mul
+
+from .utils import sigmoid
+
+
+class Phenotype:
+    """Frozen evaluation plan of a genotype.
+
+    Nodes are numbered inputs first, then the hidden layers in order and the
+    outputs last, so every node only reads values with a lower index. The
+    enabled connections are stored as flat arrays of source indices and weights
+    grouped by target node (edge_offsets[i]:edge_offsets[i + 1] are the edges of node i).
+    """
+
+    def __init__(self, num_inputs, num_nodes, layers, edge_offsets, sources, weights):
+        self.num_inputs = num_inputs
+        self.num_nodes = num_nodes
+        self.layers = layers  # (start, end, activation) for every hidden layer, the output layer last
+        self.edge_offsets = edge_offsets
+        self.sources = sources
+        self.weights = weights
+
+        self.output_start = layers[-1][0] if layers else num_inputs
+        self.batch_network = None  # NumPy version built on the first forward_batch call
+
+        # per node (source indices, weights) tuples so forward does not slice the arrays
+        self._incoming = [
+            (tuple(sources[edge_offsets[i]:edge_offsets[i + 1]]), tuple(weights[edge_offsets[i]:edge_offsets[i + 1]]))
+            for i in range(num_nodes)
+        ]
+
+    def forward(self, input_values):
+        values = [0.0] * self.num_nodes
+        num_inputs = min(len(input_values), self.num_inputs)
+        values[:num_inputs] = input_values[:num_inputs]
+
+        getter = values.__getitem__
+        incoming = self._incoming
+        for start, end, activation in self.layers:
+            for i in range(start, end):
+                node_sources, node_weights = incoming[i]
+                weighted_sum = sum(map(mul, map(getter, node_sources), node_weights))
+                values[i] = activation(weighted_sum) if activation is not None else weighted_sum
+
+        return values[self.output_start:]
+
+
+def compile_genotype(genotype):
+    """Build the Phenotype of a genotype, mirroring the evaluation order of the node layers."""
+    ordered_nodes = list(genotype.input_nodes)
+    layers = []
+    for layer in genotype.hidden_layers:
+        layers.append((len(ordered_nodes), len(ordered_nodes) + len(layer), sigmoid))
+        ordered_nodes.extend(layer)
+    output_start = len(ordered_nodes)
+    layers.append((output_start, output_start + len(genotype.output_nodes), None))
+    ordered_nodes.extend(genotype.output_nodes)
+
+    node_index = {node.node_id: i for i, node in enumerate(ordered_nodes)}
+
+    genes = genotype.connections
+    incoming = [[] for _ in ordered_nodes]
+    for from_id, to_id, weight, enabled in zip(genes.from_ids, genes.to_ids, genes.weights, genes.enabled):
+        if not enabled:
+            continue
+        to_index = node_index.get(to_id)
+        from_index = node_index.get(from_id)
+        if to_index is None or from_index is None:
+            continue
+
+        # a source only has a value if it was computed before the target, outputs are never read
+        if from_index < min(to_index, output_start):
+            incoming[to_index].append((from_index, weight))
+
+    edge_offsets = array("l", [0])
+    sources = array("l")
+    weights = array("d")
+    for node_edges in incoming:
+        for from_index, weight in node_edges:
+            sources.append(from_index)
+            weights.append(weight)
+        edge_offsets.append(len(sources))
+
+    return Phenotype(len(genotype.input_nodes), len(ordered_nodes), layers, edge_offsets, sources, weights)
@@ -0,0 +1,49 @@
+import random
+from hashlib import blake2b
+
+
+class RandomStreams:
+    """Seeded hierarchy of the random streams of a NEAT run.
+
+        run         the initial population
+        generation  selection, crossover and mutation of one generation
+        genome      one genotype, e.g. a child bred in steady state mode
+        seeds       genome_seed / episode_seed for the fitness function
+
+    Every stream is derived from the run seed and its path by hashing, so it
+    does not depend on how many numbers other streams drew nor on the process
+    or the order in which it is created. That keeps serial and parallel runs
+    identical. Without a seed every stream is the random module and the seeds
+    are None, which is the unseeded behaviour of earlier versions.
+    """
+
+    def __init__(self, seed=None):
+        self.seed = seed
+
+    def derive_seed(self, *path):
+        if self.seed is None:
+            return None
+        digest = blake2b(repr((self.seed,) + path).encode(), digest_size=8)
+        return int.from_bytes(digest.digest(), "little")
+
+    def stream(self, *path):
+        if self.seed is None:
+            return random
+        return random.Random(self.derive_seed(*path))
+
+    def run(self):
+        return self.stream("run")
+
+    def generation(self, generation):
+        return self.stream("generation", generation)
+
+    def genome(self, generation, index):
+        return self.stream("genome", generation, index)
+
+    def genome_seed(self, generation, index):
+        """Seed for evaluating genotype index of a generation, NEAT.evaluate stores it in genotype.eval_seed."""
+        return self.derive_seed("genome_seed", generation, index)
+
+    def episode_seed(self, generation, episode):
+        """Seed of an episode shared by every genotype of a generation (common random numbers)."""
+        return self.derive_seed("episode_seed", generation, episode)
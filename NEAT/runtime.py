@@ -0,0 +1,91 @@
+import math
+import mmap
+import struct
+import sys
+from array import array
+from operator import mul
+
+"""
+Standalone runtime of networks written by NEAT.export. It only needs the
+standard library, so this file can be copied into a serving process without
+the rest of the package. The file is memory mapped read only: loading reads
+the header and nothing else, every process mapping the same file shares its pages.
+
+Layout, little endian, every section 8 byte aligned:
+
+    header          magic, version, inputs, outputs, nodes, edges, section offsets
+    activations     uint8 per node: 0 none (inputs, outputs), 1 sigmoid
+    edge offsets    int32 per node + 1, edges of node i are edge_offsets[i]:edge_offsets[i + 1]
+    sources         int32 per edge, index of the source node
+    weights         float64 per edge
+
+Nodes are in evaluation order: inputs first, then the hidden layers, outputs
+last, and every node only reads nodes with a lower index.
+"""
+
+MAGIC = b"NEATNET\0"
+VERSION = 1
+
+HEADER = struct.Struct("<8sIIIIIQQQQ")
+HEADER_SIZE = 64  # HEADER padded to the section alignment
+
+ACTIVATION_NONE = 0
+ACTIVATION_SIGMOID = 1
+
+
+class ExportedNetwork:
+    """Forward passes straight from an exported network file."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.num_inputs, self.num_outputs, self.num_nodes, self.num_edges, \
+            activations_at, offsets_at, sources_at, weights_at = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an exported NEAT network")
+        if version != VERSION:
+            raise ValueError(f"Unsupported network version {version}")
+
+        view = memoryview(self.buffer)
+        self.activations = view[activations_at:activations_at + self.num_nodes]
+        self.edge_offsets = self._section(view, offsets_at, "i", self.num_nodes + 1)
+        self.sources = self._section(view, sources_at, "i", self.num_edges)
+        self.weights = self._section(view, weights_at, "d", self.num_edges)
+        self.output_start = self.num_nodes - self.num_outputs
+
+    @staticmethod
+    def _section(view, offset, typecode, count):
+        section = view[offset:offset + struct.calcsize(typecode) * count]
+        if sys.byteorder == "little":
+            return section.cast(typecode)
+        # big endian hosts pay for one copy
+        values = array(typecode)
+        values.frombytes(section)
+        values.byteswap()
+        return values
+
+    def forward(self, input_values):
+        values = [0.0] * self.num_nodes
+        num_inputs = min(len(input_values), self.num_inputs)
+        values[:num_inputs] = input_values[:num_inputs]
+
+        getter = values.__getitem__
+        offsets, sources, weights, activations = self.edge_offsets, self.sources, self.weights, self.activations
+        exp = math.exp
+        for i in range(self.num_inputs, self.num_nodes):
+            lo, hi = offsets[i], offsets[i + 1]
+            weighted_sum = sum(map(mul, map(getter, sources[lo:hi]), weights[lo:hi]))
+            values[i] = 1 / (1 + exp(-weighted_sum)) if activations[i] == ACTIVATION_SIGMOID else weighted_sum
+
+        return values[self.output_start:]
+
+    def close(self):
+        self.activations = self.edge_offsets = self.sources = self.weights = None
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
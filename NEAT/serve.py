@@ -0,0 +1,300 @@
+"""
+Asyncio inference service for evolved controllers. Forward requests of all
+connected sessions are gathered per model into micro batches: a batch runs
+through Genotype.forward_batch once max_batch requests wait or max_delay
+seconds after its first request arrived, whichever comes first.
+
+Messages are length prefixed JSON objects, a connection may pipeline requests:
+    client -> server   {"id": n, "model": name, "inputs": [...]}, {"id": n, "stats": true}
+    server -> client   {"id": n, "outputs": [...]}, {"id": n, "stats": {...}}, {"id": n, "error": text}
+
+Serve the champions of checkpoints with:  python -m NEAT.serve HOST:PORT name=checkpoint.bin ...
+(or unix:/path/to/socket)
+"""
+import asyncio
+import json
+import os
+import socket
+import sys
+import time
+
+import numpy as np
+
+from .distributed import format_address, parse_address
+
+_LENGTH_SIZE = 4
+
+
+async def read_message(reader):
+    """Next message from reader, None once the connection is closed."""
+    try:
+        header = await reader.readexactly(_LENGTH_SIZE)
+        data = await reader.readexactly(int.from_bytes(header, "little"))
+    except asyncio.IncompleteReadError:
+        return None
+    return json.loads(data)
+
+
+def write_message(writer, message):
+    data = json.dumps(message).encode()
+    writer.write(len(data).to_bytes(_LENGTH_SIZE, "little") + data)
+
+
+class ServerStats:
+    """Throughput and latency counters, latency is from arrival to the batch result."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.batch_seconds = 0.0
+
+    def add_batch(self, latencies, seconds):
+        self.batches += 1
+        self.requests += len(latencies)
+        self.latency_sum += sum(latencies)
+        self.latency_max = max(self.latency_max, max(latencies))
+        self.batch_seconds += seconds
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "batches": self.batches,
+            "requests_per_second": self.requests / elapsed if elapsed > 0 else None,
+            "mean_batch_size": self.requests / self.batches if self.batches else None,
+            "mean_latency_ms": self.latency_sum / self.requests * 1000 if self.requests else None,
+            "max_latency_ms": self.latency_max * 1000,
+            "batch_ms": self.batch_seconds * 1000,
+        }
+
+
+class _Model:
+    def __init__(self, genotype):
+        self.genotype = genotype
+        self.num_inputs = len(genotype.input_nodes)
+        self.queue = asyncio.Queue()
+        self.task = None
+
+
+class InferenceServer:
+    """Serves forward passes of named genotypes over TCP or a Unix socket.
+
+    models maps a name to a genotype. forward can also be awaited in process,
+    requests from the socket and from forward share the same batches.
+    """
+
+    def __init__(self, models, address="127.0.0.1:0", max_batch=64, max_delay=0.002):
+        self.models = {name: _Model(genotype) for name, genotype in models.items()}
+        self.address = address
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.stats = ServerStats()
+        self.server = None
+
+    async def start(self):
+        """Start listening and the batch loops, self.address is then the bound address."""
+        for model in self.models.values():
+            model.genotype.compile()
+            model.task = asyncio.create_task(self._batch_loop(model))
+
+        family, sock_address = parse_address(self.address)
+        if family == socket.AF_UNIX:
+            if os.path.exists(sock_address):
+                os.unlink(sock_address)
+            self.server = await asyncio.start_unix_server(self._handle_connection, sock_address)
+        else:
+            self.server = await asyncio.start_server(self._handle_connection, *sock_address)
+        self.address = format_address(family, self.server.sockets[0].getsockname())
+        return self
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            family, sock_address = parse_address(self.address)
+            if family == socket.AF_UNIX and os.path.exists(sock_address):
+                os.unlink(sock_address)
+            self.server = None
+        for model in self.models.values():
+            if model.task is not None:
+                model.task.cancel()
+                model.task = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def forward(self, name, inputs):
+        """Future of the outputs of model name for one input row."""
+        model = self.models.get(name)
+        if model is None:
+            raise KeyError(f"Unknown model: {name}")
+        if len(inputs) != model.num_inputs:
+            raise ValueError(f"Model {name} expects {model.num_inputs} inputs, got {len(inputs)}")
+        # rejected here, a bad row in the shared batch would fail the requests of every session
+        try:
+            inputs = [float(value) for value in inputs]
+        except (TypeError, ValueError):
+            raise ValueError(f"Model {name} expects numeric inputs, got {inputs!r}") from None
+        future = asyncio.get_running_loop().create_future()
+        model.queue.put_nowait((inputs, future, time.perf_counter()))
+        return future
+
+    async def _batch_loop(self, model):
+        while True:
+            batch = [await model.queue.get()]
+            deadline = batch[0][2] + self.max_delay
+            while len(batch) < self.max_batch:
+                if model.queue.empty():
+                    timeout = deadline - time.perf_counter()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(model.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(model.queue.get_nowait())
+
+            start = time.perf_counter()
+            try:
+                outputs = model.genotype.forward_batch(np.array([inputs for inputs, _, _ in batch], dtype=np.float64))
+            except Exception as e:
+                self.stats.errors += len(batch)
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            now = time.perf_counter()
+            for (_, future, _), row in zip(batch, outputs.tolist()):
+                if not future.done():
+                    future.set_result(row)
+            self.stats.add_batch([now - arrived for _, _, arrived in batch], now - start)
+            await asyncio.sleep(0)  # let the sessions read their results before the next batch
+
+    async def _handle_connection(self, reader, writer):
+        pending = set()
+
+        async def answer(request_id, future):
+            try:
+                write_message(writer, {"id": request_id, "outputs": await future})
+            except Exception as e:
+                write_message(writer, {"id": request_id, "error": str(e)})
+            await writer.drain()
+
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                request_id = message.get("id")
+                if message.get("stats"):
+                    write_message(writer, {"id": request_id, "stats": self.stats.snapshot()})
+                    continue
+                try:
+                    future = self.forward(message["model"], message["inputs"])
+                except (KeyError, ValueError, TypeError) as e:
+                    self.stats.errors += 1
+                    write_message(writer, {"id": request_id, "error": str(e)})
+                    continue
+                task = asyncio.create_task(answer(request_id, future))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except (ConnectionError, json.JSONDecodeError):
+            pass
+        finally:
+            for task in list(pending):
+                task.cancel()
+            writer.close()
+
+
+class InferenceClient:
+    """Client of an InferenceServer, concurrent forward calls are pipelined on one connection."""
+
+    def __init__(self, address):
+        self.address = address
+        self.reader = self.writer = None
+        self.waiting = {}
+        self.next_id = 0
+        self.receiver = None
+
+    async def connect(self):
+        family, sock_address = parse_address(self.address)
+        if family == socket.AF_UNIX:
+            self.reader, self.writer = await asyncio.open_unix_connection(sock_address)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(*sock_address)
+        self.receiver = asyncio.create_task(self._receive())
+        return self
+
+    async def _receive(self):
+        while True:
+            message = await read_message(self.reader)
+            if message is None:
+                break
+            future = self.waiting.pop(message["id"], None)
+            if future is None or future.done():
+                continue
+            if "error" in message:
+                future.set_exception(RuntimeError(message["error"]))
+            else:
+                future.set_result(message.get("outputs", message.get("stats")))
+        for future in self.waiting.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Connection to the inference server closed"))
+        self.waiting.clear()
+
+    def _request(self, message):
+        request_id = self.next_id
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request_id] = future
+        write_message(self.writer, dict(message, id=request_id))
+        return future
+
+    async def forward(self, model, inputs):
+        return await self._request({"model": model, "inputs": list(inputs)})
+
+    async def stats(self):
+        return await self._request({"stats": True})
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+        if self.receiver is not None:
+            await self.receiver
+            self.receiver = None
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+def _load_champions(specs):
+    from .NEAT import NEAT
+
+    models = {}
+    for spec in specs:
+        name, _, path = spec.partition("=")
+        models[name] = NEAT.resume(path).best_seen
+    return models
+
+
+async def _serve(address, models):
+    async with InferenceServer(models, address) as server:
+        print(f"Serving {', '.join(models)} on {server.address}", flush=True)
+        await server.server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(_serve(sys.argv[1], _load_champions(sys.argv[2:])))
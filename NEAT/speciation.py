@@ -0,0 +1,132 @@
+import numpy as np
+
+
+def _gene_features(signatures, columns):
+    """Dense presence / weight matrices over the shared innovation number columns."""
+    present = np.zeros((len(signatures), len(columns)), dtype=bool)
+    weights = np.zeros((len(signatures), len(columns)), dtype=np.float64)
+    for row, (innov_nums, gene_weights) in enumerate(signatures):
+        if innov_nums:
+            cols = np.searchsorted(columns, innov_nums)
+            present[row, cols] = True
+            weights[row, cols] = gene_weights
+    return present, weights
+
+
+def distance_matrix(genotypes, others, c1, c3, max_chunk_elements=1 << 22):
+    """
+    Compatibility distance of every genotype to every genotype in others, computed
+    with NumPy over the innovation numbers as a sparse feature space. Gives the same
+    values as Genotype.compatibility_distance (c1*Ned/N + c3W), shape (len(genotypes), len(others))
+    """
+    signatures = [g.signature() for g in genotypes]
+    other_signatures = [g.signature() for g in others]
+
+    columns = np.unique(np.fromiter(
+        (innov for innov_nums, _ in signatures + other_signatures for innov in innov_nums), dtype=np.int64
+    ))
+    present, weights = _gene_features(signatures, columns)
+    other_present, other_weights = _gene_features(other_signatures, columns)
+
+    sizes = present.sum(axis=1)
+    other_sizes = other_present.sum(axis=1)
+    matching = present.astype(np.float64) @ other_present.T.astype(np.float64)
+    disjoint_excess = sizes[:, None] + other_sizes[None, :] - 2 * matching
+    N = np.maximum(np.maximum(sizes[:, None], other_sizes[None, :]), 1)
+
+    # |w_a - w_b| summed over the matching genes, in row chunks to bound memory
+    weight_diff = np.zeros(matching.shape)
+    chunk = max(1, max_chunk_elements // max(1, len(others) * len(columns)))
+    for start in range(0, len(genotypes), chunk):
+        rows = slice(start, start + chunk)
+        both = present[rows, None, :] & other_present[None, :, :]
+        diff = np.abs(weights[rows, None, :] - other_weights[None, :, :])
+        weight_diff[rows] = np.where(both, diff, 0.0).sum(axis=-1)
+
+    avg_weight_diff = np.divide(weight_diff, matching, out=np.zeros_like(weight_diff), where=matching > 0)
+    return c1 * disjoint_excess / N + c3 * avg_weight_diff
+
+
+def first_fit_species(population, representatives, threshold, c1, c3):
+    """
+    Same first fit assignment as NEAT._assign_species, but the distances to the
+    existing representatives come from one distance matrix and every new
+    representative is compared against the still unassigned genotypes in one call.
+    Returns (species, representatives), species[i] belongs to representatives[i] and may be empty
+    """
+    representatives = list(representatives)
+    species = [[] for _ in representatives]
+    unassigned = list(range(len(population)))
+
+    if representatives and population:
+        distances = distance_matrix(population, representatives, c1, c3)
+        close = distances < threshold
+        has_species = close.any(axis=1)
+        first_species = close.argmax(axis=1)
+        for i in np.flatnonzero(has_species):
+            species[first_species[i]].append(population[i])
+        unassigned = np.flatnonzero(~has_species).tolist()
+
+    while unassigned:
+        representative = population[unassigned[0]]
+        representatives.append(representative)
+        new_species = [representative]
+        remaining = unassigned[1:]
+        if remaining:
+            distances = distance_matrix([population[i] for i in remaining], [representative], c1, c3)[:, 0]
+            new_species.extend(population[i] for i, d in zip(remaining, distances) if d < threshold)
+            remaining = [i for i, d in zip(remaining, distances) if d >= threshold]
+        species.append(new_species)
+        unassigned = remaining
+
+    return species, representatives
+
+
+def kmedoids_species(population, representatives, k, c1, c3, max_iterations=20):
+    """
+    Cluster the population into k species around medoids (members with the lowest
+    total distance to their cluster). The medoids start at the genotypes closest
+    to the previous representatives so species stay stable between generations,
+    medoid i starts from representatives[i]. Returns (species, medoids), species may be empty
+    """
+    k = max(1, min(k, len(population)))
+    distances = distance_matrix(population, population, c1, c3)
+
+    medoids = []
+    if representatives:
+        to_previous = distance_matrix(population, representatives, c1, c3)
+        for column in to_previous.T:
+            for i in np.argsort(column, kind="stable"):
+                if i not in medoids:
+                    medoids.append(int(i))
+                    break
+            if len(medoids) == k:
+                break
+
+    # fill the remaining medoids with the genotypes farthest from the chosen ones
+    if not medoids:
+        medoids.append(int(distances.sum(axis=1).argmin()))
+    while len(medoids) < k:
+        medoids.append(int(distances[:, medoids].min(axis=1).argmax()))
+
+    for _ in range(max_iterations):
+        labels = distances[:, medoids].argmin(axis=1)
+        new_medoids = []
+        for cluster in range(len(medoids)):
+            members = np.flatnonzero(labels == cluster)
+            if len(members) == 0:
+                new_medoids.append(medoids[cluster])
+                continue
+            costs = distances[np.ix_(members, members)].sum(axis=1)
+            new_medoids.append(int(members[costs.argmin()]))
+        if new_medoids == medoids:
+            break
+        medoids = new_medoids
+
+    labels = distances[:, medoids].argmin(axis=1)
+    species = [[] for _ in medoids]
+    for genotype, label in zip(population, labels):
+        species[label].append(genotype)
+
+    return species, [population[i] for i in medoids]
+
@@ -0,0 +1,152 @@
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+
+"""
+Steady state (rtNEAT style) evolution. Instead of waiting for the whole
+population, every finished evaluation replaces the worst evaluated genotype
+with a child bred from the current species, which goes straight back to the
+free worker. Every population_size finished evaluations count as one
+generation: the champion is recorded, the population is speciated again,
+the hooks run and a checkpoint is written when it is due.
+Which genotype gets replaced depends on the order in which evaluations
+finish, so a seeded steady state run is only reproducible with the serial evaluator.
+"""
+
+
+def evolve_steady_state(neat, fn_evaluate):
+    if not neat.population:
+        neat.init_population()
+
+    evaluator = neat.get_evaluator()
+    if not hasattr(evaluator, "submit"):
+        raise ValueError(f"The {neat.config.evaluator} evaluator does not support steady state evolution")
+    max_in_flight = neat.config.steady_state_in_flight or evaluator.max_in_flight
+    checkpoint_interval = neat.config.checkpoint_interval
+
+    evaluated = set()  # ids of the genotypes with a fitness score
+    in_flight = {}  # future -> genotype
+    ready = deque()  # (genotype, score) scored by the fitness cache
+    pending = deque(neat.population)  # a resumed population is evaluated again
+    episode_seeds = neat.episode_seeds(neat.generation)
+    for i, genotype in enumerate(neat.population):
+        genotype.eval_seed = neat.rng.genome_seed(neat.generation, i)
+        genotype.episode_seeds = episode_seeds
+    finished = 0
+    bred = 0
+    submitted = 0
+    evaluate_seconds = reproduce_seconds = 0.0
+
+    def submit(genotype):
+        nonlocal submitted
+        if neat.fitness_cache is not None:
+            score = neat.fitness_cache.get(neat.fitness_cache_key(genotype))
+            if score is not None:
+                ready.append((genotype, score))
+                return
+        in_flight[evaluator.submit(fn_evaluate, genotype)] = genotype
+        submitted += 1
+
+    def replace_worst():
+        nonlocal bred
+        # the parents are picked among the evaluated members of each species only
+        members = []
+        for species in neat.species:
+            scored = [g for g in species if id(g) in evaluated]
+            if scored:
+                members.append((species, scored))
+        if not members:
+            return
+
+        candidates = [g for g in neat.population if id(g) in evaluated and g is not neat.best_seen]
+        if not candidates:
+            return
+        worst = min(candidates, key=lambda g: g.fitness_score)
+
+        species_adjusted_fitness = [sum(g.fitness_score for g in scored) / len(scored) for _, scored in members]
+        child, species_idx = neat.breed_from_species(
+            species_adjusted_fitness, sum(species_adjusted_fitness), [scored for _, scored in members],
+            neat.rng.genome(neat.generation, bred),
+        )
+        child.eval_seed = neat.rng.genome_seed(neat.generation, neat.population_size + bred)
+        child.episode_seeds = episode_seeds
+        bred += 1
+
+        evaluated.discard(id(worst))
+        neat.population = [g for g in neat.population if g is not worst]
+        for species in neat.species:
+            if any(g is worst for g in species):
+                species[:] = [g for g in species if g is not worst]
+                break
+        neat.population.append(child)
+        members[species_idx][0].append(child)
+        submit(child)
+
+    def end_generation():
+        nonlocal evaluate_seconds, reproduce_seconds, episode_seeds
+        neat.last_evaluations = submitted
+        neat._emit("on_evaluation", evaluate_seconds)
+
+        gen_best = max((g for g in neat.population if id(g) in evaluated), key=lambda g: g.fitness_score)
+        neat.history.add(neat.generation, gen_best)
+
+        start = time.perf_counter()
+        neat.speciate()
+        neat._emit("on_speciation", time.perf_counter() - start)
+
+        neat.generation += 1
+        episode_seeds = neat.episode_seeds(neat.generation)
+        neat.innovations.new_generation()
+        neat._emit("on_reproduction", reproduce_seconds)
+
+        if checkpoint_interval and neat.generation % checkpoint_interval == 0:
+            neat.save_checkpoint(neat.config.checkpoint_path)
+        neat._emit("on_generation_end")
+        evaluate_seconds = reproduce_seconds = 0.0
+
+    try:
+        if neat.generation < neat.num_generations:
+            neat._emit("on_generation_start")
+
+        while in_flight or ready or pending:
+            while pending and len(in_flight) < max_in_flight:
+                submit(pending.popleft())
+
+            if not ready:
+                start = time.perf_counter()
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                evaluate_seconds += time.perf_counter() - start
+                for future in done:
+                    ready.append((in_flight.pop(future), future.result()))
+
+            genotype, score = ready.popleft()
+            neat.set_fitness(genotype, score)
+            evaluated.add(id(genotype))
+            if neat.fitness_cache is not None:
+                neat.fitness_cache.put(neat.fitness_cache_key(genotype), score)
+            if neat.best_seen is None or genotype.fitness_score > neat.best_seen.fitness_score:
+                neat.best_seen = genotype
+
+            # once the run is over the remaining evaluations are only collected
+            if neat.generation >= neat.num_generations:
+                continue
+
+            finished += 1
+            if finished % neat.population_size == 0:
+                end_generation()
+                submitted = 0
+                bred = 0
+                if neat.generation < neat.num_generations:
+                    neat._emit("on_generation_start")
+
+            if not pending and neat.generation < neat.num_generations:
+                if not neat.species:
+                    neat.speciate()
+                start = time.perf_counter()
+                replace_worst()
+                reproduce_seconds += time.perf_counter() - start
+    finally:
+        neat.close()
+
+    return neat.best_seen, neat.history.entries()
@@ -0,0 +1,91 @@
+import random
+from bisect import bisect_left, bisect_right
+
+
+class TopologyIndex:
+    """Structural indexes of a genotype, kept up to date by Genotype.mutate.
+
+        edges        (from id, to id) of every gene, enabled or not
+        node_layer   node id -> layer, inputs are -1 and outputs len(hidden_layers)
+        filled       sorted indices of the hidden layers that have nodes
+        layer_edges  (from layer, to layer) -> innovation numbers of the enabled genes
+
+    Genes are looked up by innovation number, which is unique within a
+    genotype, because inserting a gene shifts the indices of the later ones.
+    The index is rebuilt from scratch whenever the genotype got new gene
+    storage, genes or layers behind its back (e.g. in crossover), so only the
+    mutate path has to update it.
+    """
+
+    def __init__(self, genotype):
+        genes = genotype.connections
+        self.genes = genes
+        self.num_genes = len(genes)
+        self.num_layers = len(genotype.hidden_layers)
+        self.output_layer = self.num_layers
+
+        self.node_layer = genotype.node_layers()
+        self.edges = set(zip(genes.from_ids, genes.to_ids))
+        self.filled = [i for i, layer in enumerate(genotype.hidden_layers) if layer]
+
+        # groups are lists for O(1) random choice, positions (innovation number -> index in its group) for O(1) removal
+        self.layer_edges = {}
+        self.positions = {}
+        node_layer = self.node_layer
+        for innov_num, from_id, to_id, enabled in zip(genes.innov_nums, genes.from_ids, genes.to_ids, genes.enabled):
+            if enabled:
+                self._group_add((node_layer[from_id], node_layer[to_id]), innov_num)
+
+    def is_current(self, genotype):
+        return (
+            genotype.connections is self.genes
+            and len(genotype.connections) == self.num_genes
+            and len(genotype.hidden_layers) == self.num_layers
+        )
+
+    def _group_add(self, pair, innov_num):
+        group = self.layer_edges.setdefault(pair, [])
+        self.positions[innov_num] = len(group)
+        group.append(innov_num)
+
+    def add_gene(self, index):
+        """Record the gene just inserted at index."""
+        genes = self.genes
+        from_id, to_id = genes.from_ids[index], genes.to_ids[index]
+        self.num_genes += 1
+        self.edges.add((from_id, to_id))
+        if genes.enabled[index]:
+            self._group_add((self.node_layer[from_id], self.node_layer[to_id]), genes.innov_nums[index])
+
+    def add_node(self, node):
+        self.node_layer[node.node_id] = node.layer
+        i = bisect_left(self.filled, node.layer)
+        if i == len(self.filled) or self.filled[i] != node.layer:
+            self.filled.insert(i, node.layer)
+
+    def source_layers(self):
+        """Layers a new connection can start from: the inputs and every hidden layer with nodes."""
+        return [-1] + self.filled
+
+    def target_layers(self, from_layer):
+        """Layers with nodes after from_layer, the outputs last."""
+        return self.filled[bisect_right(self.filled, from_layer):] + [self.output_layer]
+
+    def pick_enabled(self, from_layer, to_layer, rng=random):
+        """Gene index of a random enabled gene between the two layers, None if there is none."""
+        group = self.layer_edges.get((from_layer, to_layer))
+        if not group:
+            return None
+        innov_num = rng.choice(group)
+        return bisect_left(self.genes.innov_nums, innov_num)
+
+    def disable_gene(self, index):
+        """Record that the enabled gene at index was disabled."""
+        genes = self.genes
+        pair = (self.node_layer[genes.from_ids[index]], self.node_layer[genes.to_ids[index]])
+        group = self.layer_edges[pair]
+        position = self.positions.pop(genes.innov_nums[index])
+        last = group.pop()
+        if position < len(group):
+            group[position] = last
+            self.positions[last] = position
@@ -0,0 +1 @@
+"""Reproducible benchmarks of the NEAT hot paths, run with python -m benchmarks."""
@@ -0,0 +1,63 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from . import cases
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the NEAT hot paths and print JSON results.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick", action="store_true", help="small genomes and populations only")
+    parser.add_argument("--only", nargs="*", choices=["genome", "population", "snake", "generation"])
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    groups = {
+        "genome": lambda: cases.genome_benchmarks(
+            args.seed, sizes=cases.GENOME_SIZES[:2] if args.quick else cases.GENOME_SIZES),
+        "population": lambda: cases.population_benchmarks(
+            args.seed, sizes=cases.POPULATION_SIZES[:1] if args.quick else cases.POPULATION_SIZES),
+        "snake": lambda: cases.snake_benchmarks(
+            args.seed, sizes=cases.GENOME_SIZES[:1] if args.quick else cases.GENOME_SIZES[:3]),
+        "generation": lambda: cases.generation_benchmarks(
+            args.seed, sizes=cases.MACRO_POPULATION_SIZES[:1] if args.quick else cases.MACRO_POPULATION_SIZES,
+            generations=1 if args.quick else 5),
+    }
+
+    results = []
+    for name in args.only or groups:
+        results.extend(groups[name]())
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "quick": args.quick,
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
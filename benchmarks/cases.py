@@ -0,0 +1,158 @@
+import random
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from NEAT.config import config
+from NEAT.genotype import crossover
+from NEAT.NEAT import NEAT
+from snake_game import SnakeGame
+
+from .genomes import make_genotype, make_population, reset_innovations
+
+GENOME_SIZES = [(10, 0), (100, 1), (1000, 5), (10000, 20)]
+POPULATION_SIZES = [50, 500, 5000]
+MACRO_POPULATION_SIZES = [50, 150]
+
+
+@contextmanager
+def override_config(**values):
+    previous = {key: config[key] for key in values}
+    config.update(values)
+    try:
+        yield
+    finally:
+        config.update(previous)
+
+
+def _seed(seed):
+    reset_innovations()
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def timeit(fn, setup=None, repeat=5, number=1):
+    """Best seconds per call over repeat runs of number calls, setup() runs untimed before every run."""
+    best = float("inf")
+    for _ in range(repeat):
+        args = setup() if setup is not None else ()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(*args)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def _result(name, seconds, **params):
+    return {"name": name, "params": params, "seconds": seconds}
+
+
+def genome_benchmarks(seed, sizes=GENOME_SIZES, repeat=5):
+    results = []
+    for num_connections, num_hidden_layers in sizes:
+        _seed(seed)
+        genotype = make_genotype(num_connections, num_hidden_layers, seed=seed)
+        other = crossover(genotype, genotype)
+        other.mutate()
+        inputs = [random.uniform(-1, 1) for _ in genotype.input_nodes]
+        batch_inputs = np.random.uniform(-1, 1, (1024, len(genotype.input_nodes)))
+        params = {"connections": num_connections, "hidden_layers": num_hidden_layers}
+        number = max(1, 10000 // num_connections)
+
+        def recompile():
+            genotype.phenotype = None
+            genotype.compile()
+
+        genotype.compile()
+        results.append(_result("compile", timeit(recompile, repeat=repeat, number=number), **params))
+        results.append(_result("forward", timeit(lambda: genotype.forward(inputs), repeat=repeat, number=number * 10), **params))
+        genotype.forward_batch(batch_inputs)
+        results.append(_result(
+            "forward_batch", timeit(lambda: genotype.forward_batch(batch_inputs), repeat=repeat, number=number),
+            rows=len(batch_inputs), **params
+        ))
+        results.append(_result("crossover", timeit(lambda: crossover(genotype, other), repeat=repeat, number=number), **params))
+        results.append(_result(
+            "mutate", timeit(lambda g: g.mutate(), setup=lambda: (crossover(genotype, genotype),), repeat=repeat * number),
+            **params
+        ))
+
+        def distance():
+            genotype.gene_signature = other.gene_signature = None
+            genotype.compatibility_distance(other)
+
+        results.append(_result("compatibility_distance", timeit(distance, repeat=repeat, number=number), **params))
+    return results
+
+
+def _neat_with_population(population):
+    with override_config(population_size=len(population)):
+        neat = NEAT(None)
+    neat.population = list(population)
+    return neat
+
+
+def population_benchmarks(seed, sizes=POPULATION_SIZES, genome=(100, 1), repeat=3):
+    results = []
+    for size in sizes:
+        _seed(seed)
+        population = make_population(size, *genome, seed=seed)
+        params = {"population_size": size, "connections": genome[0], "hidden_layers": genome[1]}
+
+        def fresh_neat():
+            neat = _neat_with_population(population)
+            return (neat,)
+
+        results.append(_result("speciate", timeit(lambda neat: neat.speciate(), setup=fresh_neat, repeat=repeat), **params))
+
+        def speciated_neat():
+            random.seed(seed)
+            neat = _neat_with_population(population)
+            neat.speciate()
+            neat.calculate_adjusted_fitness()
+            return (neat,)
+
+        results.append(_result(
+            "create_population", timeit(lambda neat: neat.create_population(), setup=speciated_neat, repeat=repeat),
+            **params
+        ))
+    return results
+
+
+def snake_benchmarks(seed, sizes=GENOME_SIZES[:3], max_steps=500, repeat=5):
+    results = []
+    for num_connections, num_hidden_layers in sizes:
+        _seed(seed)
+        genotype = make_genotype(num_connections, num_hidden_layers, seed=seed)
+        game = SnakeGame()
+
+        def play():
+            random.seed(seed)
+            game.play_with_network(genotype, max_steps=max_steps)
+
+        results.append(_result(
+            "play_with_network", timeit(play, repeat=repeat),
+            connections=num_connections, hidden_layers=num_hidden_layers, max_steps=max_steps
+        ))
+    return results
+
+
+def generation_benchmarks(seed, sizes=MACRO_POPULATION_SIZES, generations=5, max_steps=500):
+    """Full generations (evaluate, speciate, reproduce) of the snake task from a fixed seed."""
+    results = []
+    for size in sizes:
+        _seed(seed)
+        game = SnakeGame()
+
+        def evaluate_genotype(genotype):
+            return game.play_with_network(genotype, max_steps=max_steps)
+
+        with override_config(population_size=size, num_generations=generations, evaluator="serial"):
+            neat = NEAT(evaluate_genotype)
+            start = time.perf_counter()
+            neat.evolve(evaluate_genotype)
+            seconds = (time.perf_counter() - start) / (generations + 1)
+
+        results.append(_result("generation", seconds, population_size=size, max_steps=max_steps))
+    return results
@@ -0,0 +1,77 @@
+import random
+
+from NEAT.genotype import Genotype, crossover
+from NEAT.innovation import innovation_registry
+
+
+def _capacity(num_inputs, num_outputs, num_hidden_layers, nodes_per_layer):
+    """Number of distinct forward connections between the layers."""
+    layer_sizes = [num_inputs] + [nodes_per_layer] * num_hidden_layers + [num_outputs]
+    return sum(
+        layer_sizes[i] * layer_sizes[j]
+        for i in range(len(layer_sizes)) for j in range(i + 1, len(layer_sizes))
+    )
+
+
+def make_genotype(num_connections, num_hidden_layers, num_inputs=5, num_outputs=4, seed=0):
+    """
+    Synthetic genotype with exactly num_connections genes spread over
+    num_hidden_layers hidden layers. Hidden layers get just enough nodes
+    for the requested connections to be drawn at random without crowding
+    """
+    rng_state = random.getstate()
+    random.seed(seed)
+    try:
+        genotype = Genotype(num_inputs, num_outputs)
+        genes = genotype.connections
+
+        if num_connections <= len(genes):
+            for name in ("innov_nums", "from_ids", "to_ids", "weights"):
+                setattr(genes, name, getattr(genes, name)[:num_connections])
+            genes.enabled = genes.enabled[:num_connections]
+            return genotype
+
+        if num_hidden_layers == 0:
+            raise ValueError(
+                f"{num_connections} connections need hidden layers with {num_inputs} inputs and {num_outputs} outputs"
+            )
+
+        nodes_per_layer = 1
+        while _capacity(num_inputs, num_outputs, num_hidden_layers, nodes_per_layer) < 2 * num_connections:
+            nodes_per_layer += 1
+        for layer in range(num_hidden_layers):
+            for _ in range(nodes_per_layer):
+                genotype.add_node_to_layer(layer)
+
+        layers = [genotype.input_nodes] + genotype.hidden_layers + [genotype.output_nodes]
+        existing = set(zip(genes.from_ids, genes.to_ids))
+        while len(genes) < num_connections:
+            from_layer = random.randrange(len(layers) - 1)
+            to_layer = random.randrange(from_layer + 1, len(layers))
+            if from_layer == 0 and to_layer == len(layers) - 1:
+                continue  # inputs to outputs is already fully connected
+            key = (random.choice(layers[from_layer]).node_id, random.choice(layers[to_layer]).node_id)
+            if key not in existing:
+                existing.add(key)
+                genes.add(*key)
+
+        return genotype
+    finally:
+        random.setstate(rng_state)
+
+
+def make_population(size, num_connections, num_hidden_layers, seed=0):
+    """size mutated copies of one synthetic genotype, so they share most innovation numbers."""
+    base = make_genotype(num_connections, num_hidden_layers, seed=seed)
+    random.seed(seed)
+    population = []
+    for i in range(size):
+        child = crossover(base, base)
+        child.mutate()
+        child.fitness_score = random.uniform(0, 100)
+        population.append(child)
+    return population
+
+
+def reset_innovations():
+    innovation_registry.reset()
@@ -7,7 +7,9 @@ direction_list = ["up", "down", "left", "right"]
 
 
 class SnakeGame:
-    def __init__(self):
+    def __init__(self, seed=None):
+        # apples come from the random module unless the game is seeded
+        self.rng = random.Random(seed) if seed is not None else random
         self.direction = "right"
         self.positions = [initial_pos]
 
@@ -18,8 +20,10 @@ class SnakeGame:
         self.max_steps = 200  # Prevent infinite games
         self.died_by_collision = False
 
-    def reset(self):
-        """Reset the game to initial state."""
+    def reset(self, seed=None):
+        """Reset the game to initial state, a seed makes the apple positions reproducible."""
+        if seed is not None:
+            self.rng = random.Random(seed)
         self.direction = "right"
         self.positions = [initial_pos]
         self.apple_pos = self._spawn_apple()
@@ -31,8 +35,8 @@ class SnakeGame:
     def _spawn_apple(self):
         """Spawn a new apple at a random position not occupied by the snake."""
         while True:
-            x = random.randint(0, board_size - 1)
-            y = random.randint(0, board_size - 1)
+            x = self.rng.randint(0, board_size - 1)
+            y = self.rng.randint(0, board_size - 1)
             pos = (x, y)
             if pos not in self.positions:
                 return pos
@@ -140,12 +144,31 @@ class SnakeGame:
         
         return fitness
 
-    def play_with_network(self, genotype, max_steps):
-        """Play the game using a neural network genotype."""
-        self.reset()
+    def fitness_bound(self):
+        """Highest fitness the running game can still end with."""
+        remaining = self.max_steps - self.steps
+        head_x, head_y = self.positions[0]
+        distance = abs(self.apple_pos[0] - head_x) + abs(self.apple_pos[1] - head_y)
+        # every apple after the first one could be right next to the head
+        apples = 0 if distance > remaining else 1 + remaining - distance
+
+        # the step term grows up to 250 steps and shrinks after that
+        steps = max(self.steps, min(250, self.max_steps))
+        step_term = steps if steps <= 250 else steps - (steps - 100) * 4
+        return (self.score + apples) * 500 + step_term
+
+    def play_with_network(self, genotype, max_steps, seed=None, cutoff=None):
+        """Play the game using a neural network genotype, seed e.g. genotype.eval_seed.
+
+        With a cutoff (e.g. genotype.eval_cutoff) the game stops as soon as it
+        cannot reach that fitness anymore.
+        """
+        self.reset(seed)
         self.max_steps = max_steps
         
         while not self.game_over:
+            if cutoff is not None and self.fitness_bound() < cutoff:
+                break
             # Get current state
             state = self.get_state()
 
@@ -162,6 +185,10 @@ class SnakeGame:
         
         return self.get_fitness()
 
+    def play_episodes(self, genotype, max_steps, seeds):
+        """Fitness of one game per seed, e.g. genotype.episode_seeds (see vector_snake.play_population for a batch)."""
+        return [self.play_with_network(genotype, max_steps, seed) for seed in seeds]
+
     def print_board(self):
         for i in range(board_size):
             for j in range(board_size):
@@ -178,9 +205,9 @@ class SnakeGame:
             print()
         print("===" * 3)
 
-    def replay(self, genotype, max_steps=2048):
+    def replay(self, genotype, max_steps=2048, seed=None):
 
-        self.reset()
+        self.reset(seed)
         self.max_steps = max_steps
 
         while not self.game_over:
@@ -207,7 +234,10 @@ if __name__ == "__main__":
     game = SnakeGame()
     
     def evaluate_genotype(genotype):
-        fitness = game.play_with_network(genotype, max_steps=500)
+        # eval_budget and eval_cutoff are set when config fidelity_budgets is
+        fitness = game.play_with_network(
+            genotype, max_steps=genotype.eval_budget or 500, seed=genotype.eval_seed, cutoff=genotype.eval_cutoff
+        )
         return fitness
     
     # Initialize NEAT
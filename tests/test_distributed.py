@@ -0,0 +1,42 @@
+import threading
+import time
+
+from NEAT.config import Config
+from NEAT.distributed import DistributedEvaluator
+from NEAT.genotype import Genotype
+
+
+def count_connections(genotype):
+    return len(genotype.connections)
+
+
+def test_workers_survive_a_gap_between_generations():
+    evaluator = DistributedEvaluator(local_workers=2, heartbeat_interval=0.2, heartbeat_timeout=1.0)
+    config = Config.load()
+    population = [Genotype(3, 2, config) for _ in range(6)]
+    results = []
+    try:
+        results.append(evaluator.evaluate(count_connections, population))
+        time.sleep(2.0)  # longer than heartbeat_timeout, like a slow reproduction step
+
+        second = threading.Thread(target=lambda: results.append(evaluator.evaluate(count_connections, population)))
+        second.daemon = True
+        second.start()
+        second.join(timeout=15)
+        assert not second.is_alive(), "evaluate hung after the gap"
+        assert len(evaluator.workers) == 2
+    finally:
+        evaluator.close()
+    assert results == [[6] * 6, [6] * 6]
+
+
+def test_evaluate_fails_without_workers():
+    evaluator = DistributedEvaluator(local_workers=0, heartbeat_interval=0.1, heartbeat_timeout=0.5)
+    try:
+        evaluator.evaluate(count_connections, [Genotype(3, 2, Config.load())])
+    except RuntimeError as e:
+        assert "No evaluation worker" in str(e)
+    else:
+        raise AssertionError("evaluate did not fail")
+    finally:
+        evaluator.close()
@@ -0,0 +1,41 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from NEAT.NEAT import NEAT
+from NEAT.config import Config
+from NEAT.innovation import innovation_registry
+
+
+def count_connections(genotype):
+    return len(genotype.connections)
+
+
+def test_run_registry_gets_the_initial_innovations():
+    shared = (len(innovation_registry), innovation_registry.next_innov_num)
+    neat = NEAT(count_connections, Config.load(seed=1, population_size=10))
+    neat.init_population()
+    assert neat.innovations is not innovation_registry
+    assert len(neat.innovations) > 0
+    assert neat.innovations.next_innov_num == len(neat.innovations)
+    assert (len(innovation_registry), innovation_registry.next_innov_num) == shared
+
+
+def test_checkpoint_keeps_the_run_registry_across_processes(tmp_path):
+    path = tmp_path / "checkpoint.bin"
+    neat = NEAT(count_connections, Config.load(seed=1, population_size=10, num_generations=2))
+    neat.evolve(count_connections)
+    neat.save_checkpoint(path)
+    expected = (sorted(neat.innovations.innovations.items()), neat.innovations.next_innov_num)
+
+    script = (
+        "import sys\n"
+        "from NEAT.NEAT import NEAT\n"
+        "innovations = NEAT.resume(sys.argv[1]).innovations\n"
+        "print(repr((sorted(innovations.innovations.items()), innovations.next_innov_num)))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script, str(path)], check=True, capture_output=True, text=True, cwd=Path(__file__).parents[1]
+    )
+    assert len(expected[0]) > 0
+    assert eval(output.stdout) == expected
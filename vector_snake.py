@@ -0,0 +1,165 @@
+import numpy as np
+
+from snake_game import board_size, initial_pos, directions, direction_list
+
+direction_deltas = np.array([directions[d] for d in direction_list], dtype=np.int64)
+initial_direction = direction_list.index("right")
+
+
+class VectorSnakeEnv:
+    """Runs num_envs snake games in lockstep with the rules of SnakeGame.
+
+    Every board is a NumPy occupancy grid and the bodies live in a ring buffer,
+    body[n, (head[n] - k) % capacity] is segment k of snake n (0 is the head).
+    Finished boards are frozen until the next reset.
+
+    With episode_seeds board n plays episode n % len(episode_seeds): apple k of
+    an episode is placed by the same random keys on every board playing it
+    (common random numbers), whatever happened on the other boards.
+    """
+
+    def __init__(self, num_envs, max_steps=200, seed=None, episode_seeds=None):
+        self.num_envs = num_envs
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+
+        self.capacity = board_size * board_size + 1
+        self.apple_keys = None
+        if episode_seeds is not None:
+            # one row of cell keys per apple, a board holds at most capacity - 1 apples
+            self.apple_keys = np.stack([
+                np.random.default_rng(s).random((self.capacity, board_size * board_size)) for s in episode_seeds
+            ])
+            self.episode = np.arange(num_envs) % len(episode_seeds)
+        self.occupancy = np.zeros((num_envs, board_size, board_size), dtype=np.int8)
+        self.body = np.zeros((num_envs, self.capacity, 2), dtype=np.int64)
+        self.head = np.zeros(num_envs, dtype=np.int64)
+        self.length = np.ones(num_envs, dtype=np.int64)
+        self.direction = np.full(num_envs, initial_direction, dtype=np.int64)
+        self.apple_pos = np.zeros((num_envs, 2), dtype=np.int64)
+        self.score = np.zeros(num_envs, dtype=np.int64)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.game_over = np.zeros(num_envs, dtype=bool)
+        self.died_by_collision = np.zeros(num_envs, dtype=bool)
+
+        self.reset()
+
+    def reset(self):
+        """Reset every board to the initial state."""
+        self.occupancy[:] = 0
+        self.head[:] = 0
+        self.length[:] = 1
+        self.body[:, 0] = initial_pos
+        self.occupancy[:, initial_pos[0], initial_pos[1]] = 1
+        self.direction[:] = initial_direction
+        self.score[:] = 0
+        self.steps[:] = 0
+        self.game_over[:] = False
+        self.died_by_collision[:] = False
+        self._spawn_apples(np.arange(self.num_envs))
+
+    def _spawn_apples(self, envs):
+        """Place an apple on a uniformly chosen free cell of every board in envs."""
+        if len(envs) == 0:
+            return
+        free = self.occupancy[envs].reshape(len(envs), -1) == 0
+        if self.apple_keys is None:
+            keys = self.rng.random(free.shape)
+        else:
+            keys = self.apple_keys[self.episode[envs], self.score[envs]]
+        keys = np.where(free, keys, -1.0)
+        cells = keys.argmax(axis=1)
+        self.apple_pos[envs, 0] = cells // board_size
+        self.apple_pos[envs, 1] = cells % board_size
+
+    def set_direction(self, actions):
+        """Set the direction index of every board (see direction_list), reversing is ignored."""
+        actions = np.asarray(actions, dtype=np.int64)
+        # up/down and left/right are neighbours in direction_list, so the opposite is index ^ 1
+        allowed = actions != (self.direction ^ 1)
+        self.direction = np.where(allowed, actions, self.direction)
+
+    def step(self, actions=None):
+        """Move every running snake one step forward."""
+        if actions is not None:
+            self.set_direction(actions)
+
+        running = np.flatnonzero(~self.game_over)
+        if len(running) == 0:
+            return
+        self.steps[running] += 1
+
+        # the tail leaves its cell before the head moves in
+        tail_slot = (self.head[running] - self.length[running] + 1) % self.capacity
+        tail = self.body[running, tail_slot]
+        self.occupancy[running, tail[:, 0], tail[:, 1]] -= 1
+
+        new_head = self.body[running, self.head[running] % self.capacity] + direction_deltas[self.direction[running]]
+        self.head[running] += 1
+        self.body[running, self.head[running] % self.capacity] = new_head
+
+        inside = np.all((new_head >= 0) & (new_head < board_size), axis=1)
+
+        # eating an apple keeps the tail, so the snake grows by one
+        ate = inside & np.all(new_head == self.apple_pos[running], axis=1)
+        eaters = running[ate]
+        self.score[eaters] += 1
+        self.length[eaters] += 1
+        self.occupancy[eaters, tail[ate, 0], tail[ate, 1]] += 1
+
+        on_board = running[inside]
+        head_on_board = new_head[inside]
+        self.occupancy[on_board, head_on_board[:, 0], head_on_board[:, 1]] += 1
+        hit_self = self.occupancy[on_board, head_on_board[:, 0], head_on_board[:, 1]] > 1
+
+        collided = running[~inside]
+        collided = np.concatenate([collided, on_board[hit_self]])
+        self.game_over[collided] = True
+        self.died_by_collision[collided] = True
+        self.game_over[running[self.steps[running] >= self.max_steps]] = True
+
+        self._spawn_apples(eaters[~self.game_over[eaters]])
+
+    def get_state(self):
+        """(num_envs, 5) array with the same features as SnakeGame.get_state."""
+        head = self.body[np.arange(self.num_envs), self.head % self.capacity]
+        head_x, head_y = head[:, 0].astype(np.float64), head[:, 1].astype(np.float64)
+
+        dx = self.apple_pos[:, 0] - head_x
+        dy = self.apple_pos[:, 1] - head_y
+        max_distance = (board_size - 1) * (2 ** 0.5)
+
+        return np.stack([
+            head_y / board_size,
+            (board_size - 1 - head_x) / board_size,
+            (board_size - 1 - head_y) / board_size,
+            head_x / board_size,
+            np.sqrt(dx ** 2 + dy ** 2) / max_distance,
+        ], axis=1)
+
+    def get_fitness(self):
+        """Fitness of every board, same formula as SnakeGame.get_fitness."""
+        fitness = self.score * 500 + self.steps
+        fitness = np.where(self.steps > 250, fitness - (self.steps - 100) * 4, fitness)
+        return np.where(self.died_by_collision, fitness - 2000, fitness)
+
+
+def play_population(genotypes, max_steps=500, episodes=1, seed=None, episode_seeds=None):
+    """Play every genotype for `episodes` games in lockstep, returns the (len(genotypes), episodes) fitness.
+
+    With episode_seeds (e.g. genotypes[0].episode_seeds) every genotype plays
+    the same seeded episodes, one per seed.
+    """
+    from NEAT.batch import PopulationBatch
+
+    if episode_seeds is not None:
+        episodes = len(episode_seeds)
+    networks = PopulationBatch(genotypes)
+    env = VectorSnakeEnv(len(genotypes) * episodes, max_steps=max_steps, seed=seed, episode_seeds=episode_seeds)
+
+    while not env.game_over.all():
+        states = env.get_state().reshape(len(genotypes), episodes, -1)
+        outputs = networks.forward_batch(states)
+        env.step(outputs[..., :4].argmax(axis=-1).reshape(-1))
+
+    return env.get_fitness().reshape(len(genotypes), episodes)